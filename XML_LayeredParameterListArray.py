@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                     XML_LayeredParameterListArray.py
+#
+# A stack of XML_ParameterListArray layers (e.g. site -> job -> run) in
+# which parameter values specified in a later layer override those of the
+# earlier layers.
+#
+#############################################################################
+#
+# Copyright  2025- Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from XML_ParameterListArray import XML_ParameterListArray
+
+#
+# The layers are specified base first, either as XML_ParameterListArray
+# instances or as file names (loaded with an index, so that each layer is
+# searched in O(1)). Lookups search the layers from the last to the first;
+# no tree is copied or merged until flatten() is called.
+#
+class XML_LayeredParameterListArray:
+    def __init__(self, layers = None):
+        self.layers = []
+        if(layers != None):
+            for layer in layers: self.addLayer(layer)
+
+    #
+    # Adds a layer that overrides all of the current layers
+    #
+    def addLayer(self, layer):
+        if(not isinstance(layer,XML_ParameterListArray)):
+            layer = XML_ParameterListArray(layer, useIndex = True)
+        self.layers.append(layer)
+
+    #
+    # Returns the instance of parameterName in the topmost layer that specifies
+    # it, or None. An exception is raised if no layer contains parameterListName.
+    #
+    def findParameterInstance(self, parameterName, parameterListName):
+        listFound = False
+        for layer in reversed(self.layers):
+            parameterList = layer.findParameterList(parameterListName)
+            if(parameterList == None): continue
+            listFound = True
+            instance  = layer.findParameter(parameterList,parameterName,parameterListName)
+            if(instance != None): return layer, instance
+        if(not listFound):
+            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
+        return None, None
+
+    def getParameterValue(self, parameterName, parameterListName):
+        layer, instance = self.findParameterInstance(parameterName,parameterListName)
+        if(instance == None):
+            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
+                             + "\n Parameter    : " + parameterName)
+        return layer.getValue(instance)
+
+    def getParameterValueOrDefault(self, parameterName, parameterListName, defaultValue):
+        layer, instance = self.findParameterInstance(parameterName,parameterListName)
+        if(instance == None): return defaultValue
+        return layer.getValue(instance)
+
+    def isParameter(self, parameterName, parameterListName):
+        layer, instance = self.findParameterInstance(parameterName,parameterListName)
+        if(instance == None): return False
+        return True
+
+    def isParameterList(self, parameterListName):
+        for layer in self.layers:
+            if(layer.isParameterList(parameterListName)): return True
+        return False
+
+    #
+    # Returns the names of the parameters of parameterListName specified in any
+    # of the layers, in order of first appearance (base layer first).
+    #
+    def getParameterNames(self, parameterListName):
+        parameterNames = {}
+        for layer in self.layers:
+            if(not layer.isParameterList(parameterListName)): continue
+            for parameterName in layer.getParameterNames(parameterListName):
+                parameterNames.setdefault(parameterName)
+        if(len(parameterNames) == 0 and not self.isParameterList(parameterListName)):
+            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
+        return list(parameterNames)
+
+    #
+    # Returns a single XML_ParameterListArray with the layers merged; a copy of
+    # the base layer onto which each subsequent layer is overlaid with
+    # mergeParameterListArray.
+    #
+    def flatten(self):
+        if(len(self.layers) == 0):
+            raise Exception("\n Flatten of XML_LayeredParameterListArray without layers")
+        result = self.layers[0].clone()
+        for layer in self.layers[1:]:
+            result.mergeParameterListArray(layer)
+        return result
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                        XML_ParameterCampaign.py
+#
+# Reads the parameters of a campaign of XML parameter files (e.g. the case
+# files of a parameter sweep) in bulk.
+#
+#############################################################################
+#
+# Copyright  2025- Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import functools
+import concurrent.futures
+
+from XML_ParameterListArray import loadParameterDict, iterParameterListElements
+from XML_ParameterListArray import elementChildrenToDict, elementToValue
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#
+# Returns the list of the parameters of each of the files fileNames, in the
+# dictionary form returned by XML_ParameterListArray.toDict(). If workers is
+# specified, the files are parsed and decoded by a pool of that number of
+# processes, and only the (picklable) dictionaries are returned to the caller.
+#
+# The parameters returned may be restricted, which also reduces the parsing,
+# decoding and transfer costs:
+#
+#   parameterLists : a collection of parameter list names; only these
+#                    parameter lists are returned.
+#   parameters     : a collection of (parameterListName, parameterName) pairs;
+#                    only these parameters of their parameter lists are
+#                    returned (along with any lists in parameterLists).
+#
+# When either is specified, each file is streamed and parsing stops once all
+# the requested parameter lists have been read (so only the first instance of
+# a repeated parameter list is returned). Otherwise, if useCacheFile is True,
+# the dictionaries are obtained with loadParameterDict(..) and its cache files.
+#
+# Example:
+#
+#   caseInputs = loadMany(fileNames, workers = 16,
+#                         parameters = [("SolverParameters","tolerance"),("GridParameters","meshSize")])
+#
+def loadMany(fileNames, workers = None, parameterLists = None, parameters = None, useCacheFile = False):
+    parameterFilter = None
+    if(parameters != None):
+        parameterFilter = {}
+        for parameterListName, parameterName in parameters:
+            parameterFilter.setdefault(parameterListName,set()).add(parameterName)
+        parameterLists = set(parameterLists if parameterLists != None else ()) | set(parameterFilter)
+        parameterFilter = {name : frozenset(names) for name, names in parameterFilter.items()}
+    if(parameterLists != None):
+        parameterLists = frozenset(parameterLists)
+
+    load = functools.partial(loadFileParameters, parameterLists = parameterLists,\
+                             parameterFilter = parameterFilter, useCacheFile = useCacheFile)
+    return mapFiles(load,fileNames,workers)
+
+#
+# Returns the parameters of fileName (see loadMany); parameterFilter maps
+# parameter list names to the collection of the names of the parameters to
+# be returned from them. When parameterLists is specified only the first
+# instance of a repeated parameter list is returned; otherwise all of the
+# instances are, as by toDict().
+#
+def loadFileParameters(fileName, parameterLists = None, parameterFilter = None, useCacheFile = False):
+    if(parameterLists == None and useCacheFile):
+        return loadParameterDict(fileName)
+
+    parameterDict = {}
+    for parameterList in iterParameterListElements(fileName,parameterLists):
+        if(parameterLists != None and parameterList.tag in parameterDict): continue
+        parameterNames = None
+        if(parameterFilter != None): parameterNames = parameterFilter.get(parameterList.tag)
+        if(parameterNames == None):
+            values = elementChildrenToDict(parameterList)
+        else:
+            values = {}
+            for parameter in parameterList:
+                if(parameter.tag not in parameterNames): continue
+                values.setdefault(parameter.tag,[]).append(elementToValue(parameter))
+            for parameterName, instances in values.items():
+                if(len(instances) == 1): values[parameterName] = instances[0]
+        if(parameterList.tag in parameterDict):
+            if(type(parameterDict[parameterList.tag]) is not list):
+                parameterDict[parameterList.tag] = [parameterDict[parameterList.tag]]
+            parameterDict[parameterList.tag].append(values)
+        else:
+            parameterDict[parameterList.tag] = values
+    return parameterDict
+
+#
+# Extracts the parameters columns, a sequence of (parameterListName,
+# parameterName) pairs, from each of the files fileNames and returns the
+# columnar table (columnValues, columnMissing): dictionaries mapping each
+# column to the array of its values in the order of fileNames, and to the
+# boolean array that is True where the parameter is not specified in the
+# file. (The value of the first instance of a repeated parameter, in the
+# first instance of a repeated parameter list, is used.)
+#
+# Each file is streamed and parsing stops once all the parameter lists of
+# the columns have been read; only the requested parameters are decoded, and
+# no tree or per-file dictionary is retained. If workers is specified the
+# files are scanned by a pool of that number of processes.
+#
+# With NumPy, a column of bool, int or float values (ints and floats mixed
+# are stored as float) is a NumPy array of that type with missing entries
+# set to False, 0 or nan respectively; other columns are object arrays with
+# missing entries None. Without NumPy, columns are lists, with missing
+# entries None, and the masks are lists of bool.
+#
+# Example:
+#
+#   columnValues, columnMissing = extractColumns(fileNames,[("SolverParameters","tolerance")])
+#   tolerance = columnValues[("SolverParameters","tolerance")]
+#
+def extractColumns(fileNames, columns, workers = None):
+    columns = [tuple(column) for column in columns]
+    extract = functools.partial(extractFileColumns, columns = columns)
+    rows    = mapFiles(extract,fileNames,workers)
+
+    columnValues  = {}
+    columnMissing = {}
+    for columnIndex, column in enumerate(columns):
+        entries = [(values[columnIndex],found[columnIndex]) for values, found in rows]
+        columnValues[column], columnMissing[column] = createColumn(entries)
+    return columnValues, columnMissing
+
+#
+# Returns the tuples of the values of the columns in fileName (None for those
+# not specified) and of whether each column is specified.
+#
+def extractFileColumns(fileName, columns):
+    parameterColumns = {}
+    for columnIndex, (parameterListName, parameterName) in enumerate(columns):
+        parameterColumns.setdefault(parameterListName,[]).append((parameterName,columnIndex))
+
+    row   = [None]*len(columns)
+    found = [False]*len(columns)
+    read  = set()
+    for parameterList in iterParameterListElements(fileName,parameterColumns):
+        if(parameterList.tag in read): continue
+        read.add(parameterList.tag)
+        for parameterName, columnIndex in parameterColumns[parameterList.tag]:
+            parameter = parameterList.find(parameterName)
+            if(parameter == None): continue
+            row[columnIndex]   = elementToValue(parameter)
+            found[columnIndex] = True
+    return tuple(row), tuple(found)
+
+#
+# Returns the column array and missing value mask of a column from the list
+# of its (value, found) entries
+#
+def createColumn(entries):
+    values  = [value for value, found in entries]
+    missing = [not found for value, found in entries]
+    if(np == None): return values, missing
+
+    valueTypes = {type(value) for value, found in entries if found}
+    if(valueTypes == {bool}):
+        dtype, fill = bool, False
+    elif(valueTypes == {int}):
+        dtype, fill = np.int64, 0
+    elif(len(valueTypes) != 0 and valueTypes <= {int,float}):
+        dtype, fill = np.float64, np.nan
+    else:
+        column = np.empty(len(values),dtype = object)
+        column[:] = values
+        return column, np.array(missing,dtype = bool)
+
+    column = np.array([fill if isMissing else value for value, isMissing in zip(values,missing)],dtype = dtype)
+    return column, np.array(missing,dtype = bool)
+
+#
+# Returns [function(fileName) for fileName in fileNames], evaluated by a pool
+# of workers processes if workers is specified. The files are submitted in
+# chunks so that the per-task overhead is amortized over many small files.
+#
+def mapFiles(function, fileNames, workers = None):
+    fileNames = list(fileNames)
+    if(workers == None or workers <= 1 or len(fileNames) <= 1):
+        return [function(fileName) for fileName in fileNames]
+
+    chunkSize = max(1,len(fileNames)//(4*workers))
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+        return list(executor.map(function,fileNames,chunksize = chunkSize))
@@ -27,230 +27,489 @@
 #############################################################################
  
 import sys
+import os
+import copy
+import array
+import base64
+import binascii
+import marshal
+import threading
+import time
+import asyncio
+import functools
 
 import lxml.etree as ET
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 TRUE_VALS  = ( '1', 'true',  'True', 'TRUE',  'y', 'yes', 'Y', 'Yes', 'YES','ON',"on","On")
 FALSE_VALS = ( '0', 'false', 'False', 'FALSE','n', 'no',  'N', 'No',   'NO',"OFF","off","Off")
 
+# Parameter dictionary cache file (see loadParameterDict)
+
+CACHE_FILE_SUFFIX  = ".plcache"
+CACHE_FILE_MAGIC   = b"XPLA"
+CACHE_FILE_VERSION = 3
+
+# Key of the text of a parameter in the dictionary form (see toDict); not a
+# valid XML tag, so it cannot be the name of a child parameter
+
+TEXT_KEY = "#text"
+
+# Type names assigned by the parameter setters, by Python type of the value
+
+SET_TYPE_NAMES     = {int : "int",  float : "float",  str : "string", bool : "bool"}
+SET_TYPE_NAMES_CPP = {int : "long", float : "double", str : "string", bool : "bool"}
+
+# Array parameter types -> (array.array type code, NumPy dtype) of the decoded value.
+# An array value is stored in the value attribute either as whitespace separated
+# values or, if the parameter has the attribute encoding="base64", as the base64
+# encoding of the (little-endian) raw bytes of the array.
+
+ARRAY_TYPES = {"double[]" : ("d","<f8"), "float[]" : ("d","<f8"), "long[]" : ("q","<i8"), "int[]" : ("q","<i8")}
+
+INT64_MAX =  2**63 - 1
+INT64_MIN = -2**63
+
+# Member functions recorded by an instrumented XML_ParameterListArray -> (access,
+# index of the parameterName argument, index of the parameterListName argument).
+# For the batch setters the parameterName index is "keys", and the argument with
+# the second index is the dictionary keyed by (parameterListName, parameterName).
+
+INSTRUMENTED_METHODS = {"getParameterValue"          : ("read",0,1),    "getParameterValueOrText"   : ("read",0,1),
+                        "getParameterText"           : ("read",0,1),    "getParameterAll"           : ("read",0,1),
+                        "getParameterValueOrDefault" : ("read",0,1),    "isParameter"               : ("read",0,1),
+                        "getParameterInstance"       : ("read",0,1),    "handle"                    : ("read",0,1),
+                        "getParameterChildNames"     : ("read",0,1),    "getParameterChildValues"   : ("read",1,2),
+                        "getParameterNames"          : ("read",None,0), "isParameterList"           : ("read",None,0),
+                        "getParameterList"           : ("read",None,0), "getParameterListAll"       : ("read",None,0),
+                        "addParameter"               : ("write",1,2),   "addParameterChild"         : ("write",2,3),
+                        "setParameterValue"          : ("write",1,2),   "setParameterValueCPP"      : ("write",1,2),
+                        "setParameterChildValueCPP"  : ("write",2,3),   "setParameterInstanceChildValueCPP" : ("write",3,4),
+                        "setParameterValues"         : ("write","keys",0), "setParameterValuesCPP"  : ("write","keys",0),
+                        "addParameterList"           : ("write",None,0)}
+
+# Member functions guarded by the reader-writer lock of a thread safe XML_ParameterListArray
+
+LOCKED_READ_METHODS  = ("getParameterValue","getParameterValueOrText","getParameterText","getParameterAll",
+                        "getParameterValueOrDefault","getParameterNames","isParameterList","isParameter",
+                        "getParameterList","getParameterListAll","getParameterChildNames","getParameterChildValues",
+                        "getParameterInstance","handle","changedParameters","createPatch","outputChangesToFile",
+                        "toDict","clone","outputToScreen","outputToFile","outputToStream","toBytes","stats")
+LOCKED_WRITE_METHODS = ("deepcopy","createParameterListArray","addParameterList","addParameter","addParameterChild",
+                        "setParameterValue","setParameterValueCPP","setInstanceValueCPP","setParameterValues",
+                        "setParameterValuesCPP","setParameterChildValueCPP","setParameterInstanceChildValueCPP",
+                        "mergeParameterListArray","clearChanges","applyPatch","applyPatchFile","createFromDict",
+                        "replaceTree")
+
 class XML_ParameterListArray:
-    def __init__(self,fileName = None):
+    #
+    # If useIndex is True, the parameter lists and the (first instance of the)
+    # parameters they contain are entered in a hash index keyed by
+    # parameterListName and (parameterListName, parameterName). Lookups by
+    # the getters and setters then cost O(1) rather than a scan of the tree.
+    #
+    # The index is maintained by the member functions of this class. If the
+    # tree is modified directly, e.g. through an element returned by
+    # getParameterList, call buildIndex() to bring the index up to date.
+    #
+    # If parameterLists (a collection of parameter list names) is specified,
+    # only those parameter lists of fileName are loaded; the others are
+    # discarded as the file is parsed. Only the first instance of a repeated
+    # parameter list is loaded.
+    #
+    # If threadSafe is True, the member functions listed in LOCKED_READ_METHODS
+    # and LOCKED_WRITE_METHODS are guarded by a reader-writer lock, so that any
+    # number of threads may read parameters concurrently while updates are
+    # made exclusively. (Access through parameter handles is not guarded.)
+    #
+    # The modification time and size of fileName are recorded when it is loaded;
+    # reloadIfChanged() re-parses the file only if either has changed since.
+    #
+    # If instrument is True, the calls of the member functions listed in
+    # INSTRUMENTED_METHODS are counted and timed for each parameter they access
+    # (see stats()). Otherwise the member functions are not wrapped, and there
+    # is no instrumentation cost.
+    #
+    def __init__(self,fileName = None, useIndex = False, parameterLists = None, threadSafe = False,\
+                 instrument = False):
         self.tree     = None
         self.root     = None
         self.fileName = fileName
+        self.useIndex = useIndex
+        self.threadSafe         = threadSafe
+        self.lock               = None
+        self.parameterLists     = parameterLists
+        self.parameterListIndex = None
+        self.parameterIndex     = None
+        self.valueCache         = {}
+        self.changes            = {}
+        self.fileStamp          = None
+        self.watcher            = None
+        self.watcherStop        = None
+        self.instrumentation    = None
+        
+        if(instrument):
+            self.instrumentation = XML_AccessInstrumentation()
+            for methodName, (kind, nameIndex, listIndex) in INSTRUMENTED_METHODS.items():
+                setattr(self,methodName,self.instrumentation.instrument(getattr(self,methodName),\
+                                                                        methodName,nameIndex,listIndex))
+        
+        if(self.threadSafe):
+            self.lock = XML_ReadWriteLock()
+            for methodName in LOCKED_READ_METHODS:
+                setattr(self,methodName,self.lock.reading(getattr(self,methodName)))
+            for methodName in LOCKED_WRITE_METHODS:
+                setattr(self,methodName,self.lock.writing(getattr(self,methodName)))
         
         if(self.fileName != None):
-            self.tree = ET.parse(fileName)
+            self.fileStamp = getFileStamp(fileName)
+            self.tree = parseParameterListArray(fileName,parameterLists)
             self.root = self.tree.getroot()
+            if(self.useIndex): self.buildIndex()
             
+    #
+    # Sets the tree to a copy of the tree of xml_ParameterListArray (or of an
+    # lxml ElementTree). The decoded values cached by the original are copied,
+    # as they are those of the copied tree; the index, if used, is rebuilt on
+    # first lookup.
+    #
     def deepcopy(self,xml_ParameterListArray):
-        self.tree = deepcopy(xml_ParameterListArray)
+        self.valueCache.clear()
+        if(isinstance(xml_ParameterListArray,XML_ParameterListArray)):
+            self.tree = copy.deepcopy(xml_ParameterListArray.tree)
+            self.valueCache.update(xml_ParameterListArray.valueCache)
+        else:
+            self.tree = copy.deepcopy(xml_ParameterListArray)
         self.root = self.tree.getroot()
+        self.parameterListIndex = None
+        self.parameterIndex     = None
+        self.changes.clear()
+        
+    #
+    # Returns a new XML_ParameterListArray with a copy of the tree 
+    #
+    def clone(self):
+        xml_ParameterListArray = XML_ParameterListArray(useIndex = self.useIndex, threadSafe = self.threadSafe,\
+                                                        instrument = (self.instrumentation != None))
+        xml_ParameterListArray.fileName       = self.fileName
+        xml_ParameterListArray.parameterLists = self.parameterLists
+        xml_ParameterListArray.fileStamp      = self.fileStamp
+        xml_ParameterListArray.deepcopy(self)
+        return xml_ParameterListArray
         
     def createParameterListArray(self,listArrayName):
         self.tree = ET.ElementTree(ET.Element(listArrayName))
         self.root = self.tree.getroot()
+        self.changes.clear()
+        self.valueCache.clear()
+        if(self.useIndex): self.buildIndex()
+    
+    #
+    # Re-parses fileName (restricted to parameterLists, if specified) if its
+    # modification time or size has changed since it was loaded, and returns the
+    # list of (parameterListName, parameterName) pairs of the parameters that were
+    # added, removed or changed. An empty list is returned if the file is
+    # unchanged.
+    #
+    # The file is parsed, and its index built, before the current tree is
+    # replaced in a single update (with write access, if threadSafe), so that
+    # readers see either the old or the new parameters. Changes made to the
+    # tree since it was loaded are discarded, and parameter handles obtained
+    # from the old tree are no longer connected to the parameter list array.
+    #
+    def reloadIfChanged(self):
+        if(self.fileName == None):
+            raise Exception("\n Reload of XML_ParameterListArray not loaded from a file")
+        fileStamp = getFileStamp(self.fileName)
+        if(fileStamp == self.fileStamp): return []
+        
+        tree = parseParameterListArray(self.fileName,self.parameterLists)
+        parameterListIndex = None
+        parameterIndex     = None
+        if(self.useIndex):
+            parameterListIndex, parameterIndex = createIndex(tree.getroot())
+        return self.replaceTree(tree,parameterListIndex,parameterIndex,fileStamp)
+    
+    def replaceTree(self,tree,parameterListIndex,parameterIndex,fileStamp):
+        changes = getChangedParameters(self.root,tree.getroot())
+        self.tree = tree
+        self.root = tree.getroot()
+        self.parameterListIndex = parameterListIndex
+        self.parameterIndex     = parameterIndex
+        self.fileStamp = fileStamp
+        self.changes.clear()
+        self.valueCache.clear()
+        return changes
+    
+    #
+    # Starts a daemon thread that calls reloadIfChanged() every interval seconds
+    # and, if callback is specified, calls callback(changes) with the list of
+    # changed parameters after each reload that changed any. A file that cannot
+    # be parsed (e.g. one that is in the middle of being written) is skipped
+    # and tried again at the next poll.
+    #
+    # The watcher replaces the tree from its own thread, so a parameter list
+    # array read by other threads while it is watched should be threadSafe.
+    #
+    def startWatcher(self,interval = 1.0,callback = None):
+        if(self.watcher != None):
+            raise Exception("\n Watcher already started for XML_ParameterListArray : " + str(self.fileName))
+        if(self.fileName == None):
+            raise Exception("\n Watcher started for XML_ParameterListArray not loaded from a file")
+        self.watcherStop = threading.Event()
+        self.watcher     = threading.Thread(target = watchParameterListArray,\
+                                            args = (self,interval,callback,self.watcherStop),daemon = True)
+        self.watcher.start()
+    
+    def stopWatcher(self):
+        if(self.watcher == None): return
+        self.watcherStop.set()
+        if(self.watcher != threading.current_thread()): self.watcher.join()
+        self.watcher     = None
+        self.watcherStop = None
+        
+    #
+    # (Re)builds the parameter list and parameter index from the current tree.
+    # Only the first instance of a repeated parameter list or parameter is
+    # indexed, consistent with the element returned by find(..). As the tree
+    # may have been modified directly, the decoded value cache is cleared.
+    #
+    def buildIndex(self):
+        self.valueCache.clear()
+        self.indexTree()
+    
+    #
+    # Builds the index when it is first needed (e.g. after deepcopy), keeping
+    # the decoded value cache, which is valid for the tree.
+    #
+    def indexTree(self):
+        self.parameterListIndex, self.parameterIndex = createIndex(self.root)
+    
+    def findParameterList(self,parameterListName):
+        if(self.useIndex):
+            if(self.parameterListIndex == None): self.indexTree()
+            return self.parameterListIndex.get(parameterListName)
+        return self.tree.find(parameterListName)
+    
+    def findParameter(self,parameterList,parameterName,parameterListName):
+        if(self.useIndex):
+            if(self.parameterIndex == None): self.indexTree()
+            return self.parameterIndex.get((parameterListName,parameterName))
+        return parameterList.find(parameterName)
     
     def addParameterList(self,paramListName):
-        if(self.tree.find(paramListName) != None):
+        if(self.findParameterList(paramListName) != None):
             raise Exception("Duplicate parameter lists not allowed",paramListName)
-        self.root.append(ET.Element(paramListName))
+        parameterList = ET.Element(paramListName)
+        self.root.append(parameterList)
+        if(self.useIndex): self.parameterListIndex[paramListName] = parameterList
+        self.recordChange(paramListName)
     #
     # The type of the parameter is determined by the value specified. If
     # None is specified, then the type and value attributes are not set
     #   
-    def addParameter(self,value,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
+    # A one dimensional NumPy array or array.array of floats or integers is 
+    # stored as an array parameter, as whitespace separated values or, if 
+    # encoding is "base64", as base64 encoded raw bytes. 
+    #
+    def addParameter(self,value,parameterName, parameterListName, encoding = None):
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("Insertion of parameter in non-existent parameter list : ",parameterListName)
         
-        if(value == None): 
-            parameterList.append(ET.Element(parameterName))
-            return
-        
-        valStr,typeStr = self.getValueAndTypeAsStringCPP(value)
-        parameterList.append(ET.Element(parameterName,dict(type=typeStr,value=valStr)))
+        if(value is None): 
+            parameter = ET.Element(parameterName)
+        else:
+            valStr,typeStr = self.getValueAndTypeAsStringCPP(value,encoding)
+            parameter = ET.Element(parameterName,dict(type=typeStr,value=valStr))
+            if(encoding != None and typeStr in ARRAY_TYPES): parameter.set("encoding",encoding)
+            
+        parameterList.append(parameter)
+        if(self.useIndex):
+            self.parameterIndex.setdefault((parameterListName,parameter.tag),parameter)
+        self.recordChange(parameterListName,parameterName)
     
+    #
+    # The decoded scalar values of the parameters read are cached keyed by 
+    # (parameterListName, parameterName), so repeated reads of a parameter
+    # neither look it up nor decode its value. An entry is removed whenever
+    # the member functions (or a parameter handle) change the parameter (see
+    # recordChange); after the tree is modified directly, call buildIndex(),
+    # which also clears the cache.
+    #
     def getParameterValue(self,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        try:
+            return self.valueCache[(parameterListName,parameterName)]
+        except KeyError:
+            pass
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterList,parameterName,parameterListName)
         if(instance == None):
             raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
                              + "\n Parameter    : " + parameterName)
 
-        return self.getValue(instance)
+        return self.getCachedValue(instance,parameterName,parameterListName)
+    
+    def getCachedValue(self,instance,parameterName,parameterListName):
+        value = self.getValue(instance)
+        if(type(value) in CACHED_VALUE_TYPES): self.valueCache[(parameterListName,parameterName)] = value
+        return value
     
     #
-    # Version of set parameters to set the type of Python float values 
-    # as "float" and integer values as int 
+    # Returns an XML_ParameterHandle bound to (the first instance of) parameterName
+    # in parameterListName, for repeated reads or writes of the parameter value
+    # without a lookup of the parameter or a dispatch on its type.
     #
-    def setParameterValue(self, paramValue, parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
+    def handle(self,parameterName, parameterListName):
+        instance = self.getParameterInstance(parameterName, parameterListName)
+        return XML_ParameterHandle(instance,self.getValue(instance),parameterName,parameterListName,self.recordChange)
+    
+    #
+    # Returns the first instance of parameterName in parameterListName
+    #
+    def getParameterInstance(self,parameterName, parameterListName):
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterList,parameterName,parameterListName)
         if(instance == None):
             raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
-                             + "\n Parameter    : " + parameterName)       
-        originalValue = self.getParameterValue(parameterName, parameterListName)
-        originalType  = type(originalValue)
-        valType       = type(paramValue)
-        errorFlag     = False 
-        
-        if(valType == None):
-            instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-            instance.set("type", self.getValueAndTypeAsStringCPP(paramValue)[1])
-            return
-        else:
-            if(originalType is int):
-                if(valType is int):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "int")
-                else: 
-                    errorFlag = True
-                    
-            if(originalType is float):
-                if(valType is float):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "float")
-                else: 
-                    errorFlag = True      
-
-            if(originalType is str):
-                if(valType is str):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "string")
-                else: 
-                    errorFlag = True
-    
-            if(originalType is bool):
-                if(valType is bool):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "bool")
-                else:
-                    errorFlag = True
-                              
-        if(errorFlag):
-            raise Exception("\nsetParameterValueCPP value specification type not consistent with existing "  \
-            + "parameter type specification." \
-            + "\nParameterList  : " + parameterListName \
-            + "\nParameterName  : " + parameterName \
-            + "\nParameterType  : " + str(originalType) \
-            + "\nValueInputType : " + str(valType))          
+                             + "\n Parameter    : " + parameterName)
+        return instance
+    
+    #
+    # Version of set parameters to set the type of Python float values 
+    # as "float" and integer values as int 
+    #
+    def setParameterValue(self, paramValue, parameterName, parameterListName):
+        instance = self.getParameterInstance(parameterName, parameterListName)
+        self.setInstanceValue(paramValue, self.getValue(instance), instance, SET_TYPE_NAMES,\
+                              None, parameterName, parameterListName)
              
     #
     # Version of set parameters to set the type of Python float values 
     # as "double" and and integer values as long 
     #
     def setParameterValueCPP(self, paramValue, parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
-        if(parameterList == None):
-            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
-        if(instance == None):
-            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
-                             + "\n Parameter    : " + parameterName)       
-        originalValue = self.getParameterValue(parameterName, parameterListName)
-        originalType  = type(originalValue)
-        valType       = type(paramValue)
-        errorFlag     = False
-        
-        if(valType == None):
-            instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-            instance.set("type", self.getValueAndTypeAsStringCPP(paramValue)[1])
-            return
-        else:
-            if(originalType is int):
-                if(valType is int):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "long")
-                else: 
-                    errorFlag = True  
-                    
-            if(originalType is float):
-                if(valType is float):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "double")
-                else: 
-                    errorFlag = True   
-
-            if(originalType is str):
-                if(valType is str):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "string")
-                else: 
-                    errorFlag = True  
-    
-            if(originalType is bool):
-                if(valType is bool):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "bool")
-                else: 
-                    errorFlag = True  
-                             
-        if(errorFlag):
-            raise Exception("\nsetParameterValueCPP value specification type not consistent with existing "  \
-            + "parameter type specification." \
-            + "\nParameterList  : " + parameterListName \
-            + "\nParameterName  : " + parameterName \
-            + "\nParameterType  : " + str(originalType) \
-            + "\nValueInputType : " + str(valType))
+        instance = self.getParameterInstance(parameterName, parameterListName)
+        self.setInstanceValue(paramValue, self.getValue(instance), instance, SET_TYPE_NAMES_CPP,\
+                              None, parameterName, parameterListName)
     #
     # Version of set parameters to set the type of Python float values 
     # as "double" and and integer values as long 
     #
     def setInstanceValueCPP(self, paramValue, originalValue, instance,parameterChild,parameterName,parameterListName):
-        originalType  = type(originalValue)
-        valType       = type(paramValue)
-        errorFlag     = False
-        if(valType == None):
-            instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-            instance.set("type", self.getValueAndTypeAsStringCPP(paramValue)[1])
-            return
+        self.setInstanceValue(paramValue, originalValue, instance, SET_TYPE_NAMES_CPP,\
+                              parameterChild, parameterName, parameterListName)
+    
+    #
+    # Sets the value and type attributes of instance to those of paramValue, 
+    # with the type names given by typeNames (SET_TYPE_NAMES or SET_TYPE_NAMES_CPP).
+    # The type of paramValue must be that of the current value originalValue.
+    #
+    def setInstanceValue(self, paramValue, originalValue, instance, typeNames,\
+                         parameterChild, parameterName, parameterListName):
+        valStr,typeStr = self.getSetValueAndTypeAsString(paramValue, originalValue, typeNames,\
+                                                         parameterChild, parameterName, parameterListName,\
+                                                         instance.get("encoding",None))
+        if(typeStr == None): return
+        instance.set("value",valStr)
+        instance.set("type", typeStr)
+        self.recordChange(parameterListName,parameterName)
+        
+    #
+    # Returns the value and type attribute strings for setting a parameter with
+    # current value originalValue to paramValue, raising an exception if the
+    # type of paramValue is not consistent with that of originalValue. The
+    # type string is None if the type of originalValue is not one that the
+    # setters assign.
+    #
+    # An array value may be set to any array whose elements can be stored 
+    # with the element type of originalValue, with the given array encoding.
+    #
+    def getSetValueAndTypeAsString(self, paramValue, originalValue, typeNames,\
+                                   parameterChild, parameterName, parameterListName, encoding = None):
+        originalType = type(originalValue)
+        valType      = type(paramValue)
+        elementType  = getArrayElementType(originalValue)
+        if(elementType != None):
+            valElementType = getArrayElementType(paramValue)
+            errorFlag      = not (valElementType is int or valElementType is elementType)
+        elif(originalType not in typeNames): 
+            return None, None
         else:
-            if(originalType is int):
-                if(valType is int):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "long")
-                else: 
-                    errorFlag = True
-            if(originalType is float):
-                if(valType is float):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "double")
-                else: 
-                    errorFlag = True  
-
-            if(originalType is str):
-                if(valType is str):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "string")
-                else: 
-                    errorFlag = True
-    
-            if(originalType is bool):
-                if(valType is bool):
-                    instance.set("value",self.getValueAndTypeAsStringCPP(paramValue)[0])
-                    instance.set("type", "bool")
-                else: 
-                    errorFlag = True 
+            errorFlag = valType is not originalType
+        
         if(errorFlag):
-            raise Exception("\nsetParameterValueCPP value specification type not consistent with existing "  \
+            errorMessage = "\nsetParameterValueCPP value specification type not consistent with existing "  \
             + "parameter type specification." \
             + "\nParameterList  : " + parameterListName \
-            + "\nParameterName  : " + parameterName \
-            + "\nParameterChild : " + parameterChild \
+            + "\nParameterName  : " + parameterName
+            if(parameterChild != None): 
+                errorMessage += "\nParameterChild : " + parameterChild
+            raise Exception(errorMessage \
             + "\nParameterType  : " + str(originalType) \
             + "\nValueInputType : " + str(valType))
+        
+        if(elementType != None):
+            return encodeArray(paramValue,elementType,encoding), typeNames[elementType] + "[]"
+        return self.getValueAndTypeAsStringCPP(paramValue)[0], typeNames[originalType]
+    
+    #
+    # Sets the values of several parameters, where parameterValues is a dictionary 
+    # (parameterListName, parameterName) -> value. All of the parameters are located,
+    # and the types of all of the values (and the validity of their strings as
+    # XML attribute values) checked, before any value is set; if an exception
+    # is raised none of the parameter values are changed.
+    #
+    def setParameterValues(self, parameterValues):
+        self.setInstanceValues(parameterValues, SET_TYPE_NAMES)
+        
+    def setParameterValuesCPP(self, parameterValues):
+        self.setInstanceValues(parameterValues, SET_TYPE_NAMES_CPP)
+        
+    def setInstanceValues(self, parameterValues, typeNames):
+        parameterLists = {}
+        updates        = []
+        for (parameterListName, parameterName), paramValue in parameterValues.items():
+            if(parameterListName in parameterLists):
+                parameterList = parameterLists[parameterListName]
+            else:
+                parameterList = self.findParameterList(parameterListName)
+                if(parameterList == None):
+                    raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
+                parameterLists[parameterListName] = parameterList
+                
+            instance = self.findParameter(parameterList,parameterName,parameterListName)
+            if(instance == None):
+                raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
+                                 + "\n Parameter    : " + parameterName)
+                
+            valStr,typeStr = self.getSetValueAndTypeAsString(paramValue, self.getValue(instance), typeNames,\
+                                                             None, parameterName, parameterListName,\
+                                                             instance.get("encoding",None))
+            if(typeStr == None): continue
+            checkAttributeValue(valStr)
+            updates.append((instance,valStr,typeStr,parameterName,parameterListName))
+            
+        for instance, valStr, typeStr, parameterName, parameterListName in updates:
+            instance.set("value",valStr)
+            instance.set("type", typeStr)
+            self.recordChange(parameterListName,parameterName)
+        
     #    
     # Sets the value of the child of the parameter parameterName. If there is more than 
     # one parameterName parameters in the parameterList then this only sets the first instance
     # value. 
     #            
     def setParameterChildValueCPP(self,paramValue,parameterChildName,parameterName,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
         instances = parameterList.findall(parameterName)
@@ -272,7 +531,7 @@ class XML_ParameterListArray:
         self.setInstanceValueCPP(paramValue, originalValue,childParam[0], parameterChildName, parameterName,parameterListName)
        
     def setParameterInstanceChildValueCPP(self,paramValue,instanceIndex,parameterChildName,parameterName,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
         instances = parameterList.findall(parameterName)
@@ -290,20 +549,20 @@ class XML_ParameterListArray:
         self.setInstanceValueCPP(paramValue, originalValue,childParam,parameterChildName,parameterName,parameterListName)
 
     def getParameterValueOrText(self,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterList,parameterName,parameterListName)
         if(instance == None):
             raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
                              + "\n Parameter    : " + parameterName)
         return self.getValueOrText(instance)
     
     def getParameterText(self,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterList,parameterName,parameterListName)
         if(instance == None):
             raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
                              + "\n Parameter    : " + parameterName)
@@ -311,7 +570,7 @@ class XML_ParameterListArray:
         return instance.text.strip()
       
     def getParameterAll(self,parameterName, parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
         parameters = parameterList.findall(parameterName)
@@ -322,17 +581,21 @@ class XML_ParameterListArray:
         return parameters
 
     def getParameterValueOrDefault(self,parameterName, parameterListName,defaultValue):
-        parameterList = self.tree.find(parameterListName)
+        try:
+            return self.valueCache[(parameterListName,parameterName)]
+        except KeyError:
+            pass
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterList,parameterName,parameterListName)
         parameterValue = defaultValue;
         if(instance != None):
-            parameterValue = self.getValue(instance)  
+            parameterValue = self.getCachedValue(instance,parameterName,parameterListName)
         return parameterValue
     
     def getParameterNames(self,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
         parameterNames = []
@@ -342,20 +605,20 @@ class XML_ParameterListArray:
         return parameterNames
     
     def isParameterList(self,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None): return False       
         return True
     
     def isParameter(self,parameterName,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterList,parameterName,parameterListName)
         if(instance == None): return False
         return True
     
     def getParameterList(self,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
         
@@ -369,10 +632,10 @@ class XML_ParameterListArray:
         return parameterList
     
     def getParameterChildNames(self,parameterName,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterList,parameterName,parameterListName)
         if(instance == None):
             raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
                              + "\n Parameter    : " + parameterName)
@@ -383,10 +646,10 @@ class XML_ParameterListArray:
         return childNames
     
     def getParameterChildValues(self,parameterChildName,parameterName,parameterListName):
-        parameterList = self.tree.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList == None):
             raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
-        instance = parameterList.find(parameterName)
+        instance = self.findParameter(parameterList,parameterName,parameterListName)
         if(instance == None):
             raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
                              + "\n Parameter    : " + parameterName)
@@ -408,14 +671,14 @@ class XML_ParameterListArray:
     # If the parameter specified does not exist, then it is created
     #
     def addParameterChild(self, value, childName, parameterName, parameterListName): 
-        parameterList = self.root.find(parameterListName)
+        parameterList = self.findParameterList(parameterListName)
         if(parameterList.findall(parameterName) == []):
             self.addParameter(None,parameterName,parameterListName)
     
         for instance in parameterList.findall(parameterName):
             if(instance.get("value") != None):
                 raise Exception("Adding child to a parameter with value not allowed",childName,parameterName,parameterListName)
-            if(value == None):
+            if(value is None):
                 if(instance.find(childName) != None):
                     raise Exception("Duplicate child parameters not allowed",childName,parameterName,parameterListName)
                 else:
@@ -426,12 +689,169 @@ class XML_ParameterListArray:
                 else:
                     valStr,typeStr = self.getValueAndTypeAsStringCPP(value)
                     instance.append(ET.Element(childName,dict(type=typeStr,value=valStr)))
+        self.recordChange(parameterListName,parameterName)
     
     #addParameterInstanceChild(XML_dataType value, int instanceIndex, const char* parameterChildName,
     #const char* parameterName, const char* parameterListName)       
                 
-    def getValueAndTypeAsString(self,value):
-        if(type(value) is float): 
+    #
+    # Overlays the parameter lists of xml_ParameterListArray onto this parameter 
+    # list array. A parameter list that is not present is appended. Otherwise
+    # each parameter of the overlaid parameter list replaces all instances of
+    # the parameter of the same name (or is appended if there are none).
+    # Copies of the overlaid elements are inserted.
+    #
+    def mergeParameterListArray(self,xml_ParameterListArray):
+        for overlayList in xml_ParameterListArray.root:
+            if not isinstance(overlayList.tag,str): continue
+            parameterList = self.findParameterList(overlayList.tag)
+            if(parameterList == None):
+                parameterList = copy.deepcopy(overlayList)
+                appendElement(self.root,parameterList)
+                self.recordChange(parameterList.tag)
+                for parameter in parameterList:
+                    if not isinstance(parameter.tag,str): continue
+                    self.recordChange(parameterList.tag,parameter.tag)
+                    if(self.useIndex):
+                        self.parameterIndex.setdefault((parameterList.tag,parameter.tag),parameter)
+                if(self.useIndex): self.parameterListIndex[parameterList.tag] = parameterList
+                continue
+            
+            overlayParameters = {}
+            for parameter in overlayList:
+                if not isinstance(parameter.tag,str): continue
+                overlayParameters.setdefault(parameter.tag,[]).append(parameter)
+            
+            existingParameters = {}
+            for parameter in parameterList:
+                if not isinstance(parameter.tag,str): continue
+                if(parameter.tag in overlayParameters):
+                    existingParameters.setdefault(parameter.tag,[]).append(parameter)
+                    
+            for parameterName, instances in overlayParameters.items():
+                copies = [copy.deepcopy(instance) for instance in instances]
+                if(parameterName in existingParameters):
+                    existing = existingParameters[parameterName]
+                    position = parameterList.index(existing[0])
+                    for instance in copies:
+                        instance.tail = existing[0].tail
+                    for instance in existing: 
+                        parameterList.remove(instance)
+                    for k, instance in enumerate(copies):
+                        parameterList.insert(position + k,instance)
+                else:
+                    for instance in copies: 
+                        appendElement(parameterList,instance)
+                if(self.useIndex):
+                    self.parameterIndex[(parameterList.tag,parameterName)] = copies[0]
+                self.recordChange(parameterList.tag,parameterName)
+    
+    #
+    # Change tracking: the parameter lists and parameters added or set by the 
+    # member functions (or parameter handles) since the parameter list array was
+    # loaded or created, or since clearChanges() was called. The cached value
+    # of a changed parameter is discarded.
+    #
+    def recordChange(self,parameterListName,parameterName = None):
+        parameterNames = self.changes.setdefault(parameterListName,{})
+        if(parameterName != None): 
+            parameterNames[parameterName] = None
+            self.valueCache.pop((parameterListName,parameterName),None)
+    
+    def clearChanges(self):
+        self.changes.clear()
+    
+    #
+    # Returns the list of changed (parameterListName, parameterName) pairs; a
+    # parameter list added without parameters is reported as (parameterListName, None).
+    #
+    def changedParameters(self):
+        changes = []
+        for parameterListName, parameterNames in self.changes.items():
+            if(len(parameterNames) == 0): changes.append((parameterListName,None))
+            for parameterName in parameterNames:
+                changes.append((parameterListName,parameterName))
+        return changes
+    
+    #
+    # Returns an XML_ParameterListArray with (copies of) all instances of the
+    # changed parameters in their parameter lists. Applying the patch to the
+    # parameter list array as loaded (with applyPatch) reproduces its current
+    # values.
+    #
+    def createPatch(self):
+        patch = XML_ParameterListArray()
+        patch.createParameterListArray(self.root.tag)
+        for parameterListName, parameterNames in self.changes.items():
+            parameterList = self.findParameterList(parameterListName)
+            patchList     = ET.SubElement(patch.root,parameterListName)
+            for parameterName in parameterNames:
+                for instance in parameterList.findall(parameterName):
+                    patchList.append(copy.deepcopy(instance))
+        ET.indent(patch.tree)
+        return patch
+    
+    def outputChangesToFile(self,fileName):
+        self.createPatch().outputToFile(fileName)
+        
+    def applyPatch(self,patch):
+        self.mergeParameterListArray(patch)
+        
+    def applyPatchFile(self,fileName):
+        self.mergeParameterListArray(XML_ParameterListArray(fileName))
+    
+    #
+    # Returns the contents of the parameter list array as a nested dictionary
+    # parameterListName -> parameterName -> value, decoded in a single pass over
+    # the tree. A parameter with child parameters is represented by a dictionary
+    # childName -> value, a parameter with only text by the dictionary
+    # {TEXT_KEY : text}, and repeated parameters (or parameter lists) by a
+    # list of the instance values. See elementToValue(..). createFromDict(..)
+    # is its inverse, up to the type names of the values and the stripping of
+    # the text.
+    #
+    def toDict(self):
+        return elementChildrenToDict(self.root)
+    
+    #
+    # Creates the parameter list array listArrayName from a dictionary of the
+    # form returned by toDict(). Values are stored with the types assigned by
+    # getValueAndTypeAsStringCPP.
+    #
+    def createFromDict(self,parameterDict,listArrayName):
+        self.createParameterListArray(listArrayName)
+        for parameterListName, parameterLists in parameterDict.items():
+            if(type(parameterLists) is not list): parameterLists = [parameterLists]
+            for parameters in parameterLists:
+                if(type(parameters) is not dict):
+                    raise Exception("Parameter list specification is not a dictionary",parameterListName)
+                self.appendDictElements(ET.SubElement(self.root,parameterListName),parameters)
+        if(self.useIndex): self.buildIndex()
+        
+    def appendDictElements(self,element,valueDict):
+        for name, values in valueDict.items():
+            if(name == TEXT_KEY):
+                element.text = values
+                continue
+            if(type(values) is not list): values = [values]
+            for value in values:
+                if(value is None):
+                    ET.SubElement(element,name)
+                elif(type(value) is dict):
+                    self.appendDictElements(ET.SubElement(element,name),value)
+                else:
+                    valStr,typeStr = self.getValueAndTypeAsStringCPP(value)
+                    ET.SubElement(element,name,dict(type=typeStr,value=valStr))
+    
+    def getValueAndTypeAsString(self,value,encoding = None):
+        elementType = getArrayElementType(value)
+        if(elementType is float):
+            typeStr = "float[]"
+            valStr  = encodeArray(value,float,encoding)
+        elif(elementType is int):
+            typeStr = "int[]"
+            valStr  = encodeArray(value,int,encoding)
+        elif(type(value) is float): 
             typeStr = "float"
             valStr  = '{0:16.15e}'.format(value)
         elif(type(value) is bool) : 
@@ -449,8 +869,15 @@ class XML_ParameterListArray:
         
         return valStr,typeStr
     
-    def getValueAndTypeAsStringCPP(self,value):
-        if(type(value) is float): 
+    def getValueAndTypeAsStringCPP(self,value,encoding = None):
+        elementType = getArrayElementType(value)
+        if(elementType is float):
+            typeStr = "double[]"
+            valStr  = encodeArray(value,float,encoding)
+        elif(elementType is int):
+            typeStr = "long[]"
+            valStr  = encodeArray(value,int,encoding)
+        elif(type(value) is float): 
             typeStr = "double"
             valStr  = '{0:16.15e}'.format(value)
         elif(type(value) is bool) : 
@@ -503,10 +930,88 @@ class XML_ParameterListArray:
     
     
     def outputToScreen(self):
-        print(ET.tostring(self.tree, pretty_print=True, encoding='utf-8').decode())
+        if(not hasattr(sys.stdout,"buffer")):
+            print(ET.tostring(self.tree, pretty_print=True, encoding='utf-8').decode())
+            return
+        sys.stdout.flush()
+        self.tree.write(sys.stdout.buffer, pretty_print=True, encoding='utf-8')
+        sys.stdout.buffer.write(b"\n")
+        sys.stdout.buffer.flush()
         
-    def outputToFile(self,fileName):
-        self.tree.write(fileName, pretty_print=True, encoding="utf-8", xml_declaration=True)
+    def outputToFile(self,fileName,prettyPrint = True):
+        self.tree.write(fileName, pretty_print=prettyPrint, encoding="utf-8", xml_declaration=True)
+    
+    #
+    # Writes the XML to a binary file-like object, or returns it as bytes, 
+    # without indentation unless prettyPrint is True.
+    #
+    def outputToStream(self,fileObject,prettyPrint = False,xmlDeclaration = True):
+        self.tree.write(fileObject, pretty_print=prettyPrint, encoding="utf-8", xml_declaration=xmlDeclaration)
+        
+    def toBytes(self,prettyPrint = False,xmlDeclaration = True):
+        return ET.tostring(self.tree, pretty_print=prettyPrint, encoding="utf-8", xml_declaration=xmlDeclaration)
+    
+    #
+    # Access statistics of an instrumented XML_ParameterListArray: a dictionary with
+    #
+    #   "methods"    : methodName -> {"count", "seconds"}, the calls of each of
+    #                  the INSTRUMENTED_METHODS and their total time
+    #   "parameters" : a list of {"parameterListName", "parameterName", "reads",
+    #                  "writes", "seconds"} for each parameter accessed, most
+    #                  frequently accessed first
+    #   "neverRead"  : the (parameterListName, parameterName) pairs of the
+    #                  parameters in the tree that have not been read
+    #
+    # Only the outermost instrumented call is recorded when one instrumented member
+    # function calls another, and reads or writes through parameter handles
+    # (after the call of handle(..)) are not recorded. A call of setParameterValues
+    # (or setParameterValuesCPP) counts as a write of each parameter set, so the
+    # "count" of these methods is the number of parameters written.
+    #
+    def stats(self):
+        if(self.instrumentation == None):
+            raise Exception("\n Statistics requested of XML_ParameterListArray without instrumentation")
+        methods, parameters, reads = self.instrumentation.getStatistics()
+        neverRead = []
+        for parameterList in self.root:
+            if not isinstance(parameterList.tag,str): continue
+            for parameter in parameterList:
+                if not isinstance(parameter.tag,str): continue
+                key = (parameterList.tag,parameter.tag)
+                if(key not in reads): neverRead.append(key)
+        return {"methods" : methods, "parameters" : parameters, "neverRead" : list(dict.fromkeys(neverRead))}
+    
+    def clearStats(self):
+        if(self.instrumentation != None): self.instrumentation.clear()
+    
+    #
+    # Sets the function called, as callback(methodName, parameterListName,
+    # parameterName, seconds), after each recorded call of an instrumented
+    # member function (None to remove it). parameterName is None for member
+    # functions of a parameter list.
+    #
+    def setInstrumentationCallback(self,callback):
+        if(self.instrumentation == None):
+            raise Exception("\n Instrumentation callback set for XML_ParameterListArray without instrumentation")
+        self.instrumentation.callback = callback
+    
+    #
+    # Coroutine versions of loading and outputToFile for use with asyncio; the
+    # parse and the serialization are run in executor (the event loop's default
+    # executor if None), so the event loop is not blocked.
+    #
+    #   xml_ParameterListArray = await XML_ParameterListArray.aload("case.xml")
+    #   await xml_ParameterListArray.asave("case_out.xml")
+    #
+    @classmethod
+    async def aload(cls,fileName,useIndex = False,parameterLists = None,threadSafe = False,executor = None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor,functools.partial(cls,fileName,useIndex = useIndex,\
+                                          parameterLists = parameterLists,threadSafe = threadSafe))
+    
+    async def asave(self,fileName,prettyPrint = True,executor = None):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor,functools.partial(self.outputToFile,fileName,prettyPrint = prettyPrint))
              
     def getType(self,paramElement):
         valType = paramElement.get("type",None)
@@ -539,30 +1044,7 @@ class XML_ParameterListArray:
         if(strVal == None):
             raise ValueError("value attribute not specified in ",paramElement)
         
-        if(valType != None) : 
-            try:
-                if(valType == "string"): return strVal
-                if(valType == "float") : return float(strVal)
-                if(valType == "double"): return float(strVal)
-                if(valType == "int")   : return int(strVal)
-                if(valType == "long")  : return int(strVal)
-                if(valType == "bool")  : 
-                    if(strVal in TRUE_VALS) : return True
-                    if(strVal in FALSE_VALS): return False
-            except:
-                raise ValueError("type inconsistent with value specified or type un-supported",\
-                                 paramElement).with_traceback(sys.exc_info()[2])
-        
-        try:
-            float(strVal)
-            if(strVal.find(".") >= 0) : return float(strVal) 
-            else:                       return int(strVal)
-        except ValueError:
-            if(strVal in TRUE_VALS):
-                return True 
-            if(strVal in FALSE_VALS) : 
-                return False 
-            return strVal 
+        return decodeValue(valType,strVal,paramElement)
 
     def getValueOrText(self,paramElement):
         val = paramElement.get('value',None)
@@ -575,36 +1057,725 @@ class XML_ParameterListArray:
             return None
  
            
+    #
+    # Values with a scalar type attribute are converted directly by the converter
+    # of their type (see TYPE_CONVERTERS); a value that the converter rejects
+    # is handed to decodeValue, which reports the error (or, for bool, falls
+    # back to inferring the type). The type of an untyped value is inferred by
+    # decodeValue.
+    #
     def getValue(self,paramElement):
         valType = paramElement.get('type',None)
         strVal  = paramElement.get("value",None)
         if(strVal == None):
             raise ValueError("value attribute not specified in ",paramElement)
+        if(valType == "string"): return strVal
+        converter = TYPE_CONVERTERS.get(valType)
+        if(converter != None):
+            try:
+                return converter(strVal)
+            except ValueError:
+                return decodeValue(valType,strVal,paramElement)
+        if(valType in ARRAY_TYPES):
+            return decodeArray(valType,strVal,paramElement.get("encoding",None),paramElement)
         
-        if(valType != None) : 
+        return decodeValue(valType,strVal,paramElement)
+    
+#
+# A parameter handle holds the parameter element and the conversions between
+# its value attribute and the Python value, determined once from the type of
+# the parameter value when the handle is created (see handle(..)).
+#
+# set(value) only assigns the value attribute; value must have the type of the
+# parameter value (for an array parameter, be a one dimensional array with
+# elements of its element type, or int, as for setParameterValueCPP). The handle refers to the element itself, and so is not
+# valid once the element is removed from the tree.
+#
+class XML_ParameterHandle:
+    __slots__ = ("element","valueType","elementType","converter","formatter","parameterName","parameterListName",
+                 "recordChange")
+    
+    def __init__(self,element,value,parameterName,parameterListName,recordChange):
+        self.element           = element
+        self.recordChange      = recordChange
+        self.valueType         = type(value)
+        self.parameterName     = parameterName
+        self.parameterListName = parameterListName
+        
+        elementType      = getArrayElementType(value)
+        self.elementType = elementType
+        if(elementType != None):
+            valType  = "double[]" if elementType is float else "long[]"
+            encoding = element.get("encoding",None)
+            self.converter = lambda strVal : decodeArray(valType,strVal,encoding,element)
+            self.formatter = lambda value  : encodeArray(value,elementType,encoding)
+        elif(self.valueType is bool):
+            self.converter = decodeBool
+            self.formatter = lambda value : "true" if value else "false"
+        elif(self.valueType is int):
+            self.converter = int
+            self.formatter = '{0:d}'.format
+        elif(self.valueType is float):
+            self.converter = float
+            self.formatter = '{0:16.15e}'.format
+        else:
+            self.converter = str
+            self.formatter = str
+        
+    def get(self):
+        return self.converter(self.element.get("value"))
+    
+    def set(self,value):
+        if(self.elementType != None):
+            valElementType = getArrayElementType(value)
+            errorFlag      = not (valElementType is int or valElementType is self.elementType)
+        else:
+            errorFlag      = type(value) is not self.valueType
+        if(errorFlag):
+            raise Exception("\nXML_ParameterHandle value specification type not consistent with existing "  \
+            + "parameter type specification." \
+            + "\nParameterList  : " + self.parameterListName \
+            + "\nParameterName  : " + self.parameterName \
+            + "\nParameterType  : " + str(self.valueType) \
+            + "\nValueInputType : " + str(type(value)))
+        self.element.set("value",self.formatter(value))
+        self.recordChange(self.parameterListName,self.parameterName)
+
+#
+# Counts and times the calls of instrumented member functions by
+# (methodName, parameterListName, parameterName).
+#
+class XML_AccessInstrumentation:
+    def __init__(self):
+        self.calls    = {}
+        self.callback = None
+        self.lock     = threading.Lock()
+        self.local    = threading.local()
+    
+    #
+    # Returns function wrapped to record its calls as methodName; the parameter
+    # name and parameter list name are the arguments with indices nameIndex and
+    # listIndex (or passed by the keywords parameterName and parameterListName).
+    # A call of a batch setter (nameIndex "keys") is recorded as a call for each
+    # of the parameters set, the time of the call divided between them.
+    #
+    def instrument(self,function,methodName,nameIndex,listIndex):
+        def instrumented(*args,**kwargs):
+            depth = getattr(self.local,"depth",0)
+            if(depth != 0): return function(*args,**kwargs)
+            self.local.depth = 1
+            start = time.perf_counter()
             try:
-                if(valType == "string"): return strVal
-                if(valType == "float") : return float(strVal)
-                if(valType == "double"): return float(strVal)
-                if(valType == "int")   : return int(strVal)
-                if(valType == "long")  : return int(strVal)
-                if(valType == "bool")  : 
-                    if(strVal in TRUE_VALS) : return True
-                    if(strVal in FALSE_VALS): return False
-            except:
-                raise ValueError("type inconsistent with value specified or type un-supported",\
-                                 paramElement).with_traceback(sys.exc_info()[2])
+                return function(*args,**kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                self.local.depth = 0
+                if(nameIndex == "keys"):
+                    self.recordBatch(methodName,getArgument(args,kwargs,listIndex,"parameterValues"),seconds)
+                else:
+                    parameterName     = getArgument(args,kwargs,nameIndex,"parameterName")
+                    parameterListName = getArgument(args,kwargs,listIndex,"parameterListName")
+                    self.record(methodName,parameterListName,parameterName,seconds)
+        return instrumented
+    
+    def record(self,methodName,parameterListName,parameterName,seconds):
+        key = (methodName,parameterListName,parameterName)
+        with self.lock:
+            call = self.calls.get(key)
+            if(call == None):
+                self.calls[key] = [1,seconds]
+            else:
+                call[0] += 1
+                call[1] += seconds
+        if(self.callback != None): self.callback(methodName,parameterListName,parameterName,seconds)
+    
+    def recordBatch(self,methodName,parameterValues,seconds):
+        keys = list(parameterValues) if parameterValues != None else []
+        if(len(keys) == 0):
+            self.record(methodName,None,None,seconds)
+            return
+        for parameterListName, parameterName in keys:
+            self.record(methodName,parameterListName,parameterName,seconds/len(keys))
         
+    def clear(self):
+        with self.lock:
+            self.calls.clear()
+    
+    #
+    # Returns the per method and per parameter statistics (see
+    # XML_ParameterListArray.stats) and the set of the parameters read
+    #
+    def getStatistics(self):
+        with self.lock:
+            calls = [(key,call[0],call[1]) for key, call in self.calls.items()]
+        methods    = {}
+        parameters = {}
+        reads      = set()
+        for (methodName, parameterListName, parameterName), count, seconds in calls:
+            method = methods.setdefault(methodName,{"count" : 0, "seconds" : 0.0})
+            method["count"]   += count
+            method["seconds"] += seconds
+            if(parameterListName == None or parameterName == None): continue
+            parameter = parameters.setdefault((parameterListName,parameterName),\
+                {"parameterListName" : parameterListName, "parameterName" : parameterName,\
+                 "reads" : 0, "writes" : 0, "seconds" : 0.0})
+            if(INSTRUMENTED_METHODS[methodName][0] == "read"):
+                parameter["reads"] += count
+                reads.add((parameterListName,parameterName))
+            else:
+                parameter["writes"] += count
+            parameter["seconds"] += seconds
+        parameters = sorted(parameters.values(),key = lambda p : p["reads"] + p["writes"],reverse = True)
+        return methods, parameters, reads
+
+def getArgument(args,kwargs,index,keyword):
+    if(index == None): return None
+    if(index < len(args)): return args[index]
+    return kwargs.get(keyword)
+
+#
+# A reader-writer lock; any number of threads may hold read access, or one
+# thread write access, and waiting writers take precedence over new readers.
+# Both are reentrant, and the thread holding write access may also acquire
+# read access (but not the reverse).
+#
+class XML_ReadWriteLock:
+    def __init__(self):
+        self.condition      = threading.Condition(threading.Lock())
+        self.readerCount    = 0
+        self.writer         = None
+        self.writerDepth    = 0
+        self.writersWaiting = 0
+        self.local          = threading.local()
+        
+    def acquireRead(self):
+        readDepth = getattr(self.local,"readDepth",0)
+        if(readDepth == 0 and self.writer != threading.get_ident()):
+            with self.condition:
+                while(self.writer != None or self.writersWaiting > 0):
+                    self.condition.wait()
+                self.readerCount += 1
+        self.local.readDepth = readDepth + 1
+        
+    def releaseRead(self):
+        self.local.readDepth -= 1
+        if(self.local.readDepth == 0 and self.writer != threading.get_ident()):
+            with self.condition:
+                self.readerCount -= 1
+                if(self.readerCount == 0): self.condition.notify_all()
+    
+    def acquireWrite(self):
+        if(self.writer == threading.get_ident()):
+            self.writerDepth += 1
+            return
+        if(getattr(self.local,"readDepth",0) != 0):
+            raise Exception("XML_ReadWriteLock : write access requested by a thread holding read access")
+        with self.condition:
+            self.writersWaiting += 1
+            while(self.writer != None or self.readerCount > 0):
+                self.condition.wait()
+            self.writersWaiting -= 1
+            self.writer      = threading.get_ident()
+            self.writerDepth = 1
+            
+    def releaseWrite(self):
+        self.writerDepth -= 1
+        if(self.writerDepth == 0):
+            with self.condition:
+                self.writer = None
+                self.condition.notify_all()
+    
+    #
+    # Return function wrapped to be called with read (or write) access
+    #
+    def reading(self,function):
+        def readLocked(*args,**kwargs):
+            self.acquireRead()
+            try:
+                return function(*args,**kwargs)
+            finally:
+                self.releaseRead()
+        return readLocked
+    
+    def writing(self,function):
+        def writeLocked(*args,**kwargs):
+            self.acquireWrite()
+            try:
+                return function(*args,**kwargs)
+            finally:
+                self.releaseWrite()
+        return writeLocked
+
+#
+# Returns the parameter list index and parameter index of the tree with root
+# root (see XML_ParameterListArray.buildIndex)
+#
+def createIndex(root):
+    parameterListIndex = {}
+    parameterIndex     = {}
+    for parameterList in root:
+        if not isinstance(parameterList.tag,str): continue
+        if(parameterList.tag in parameterListIndex): continue
+        parameterListIndex[parameterList.tag] = parameterList
+        for parameter in parameterList:
+            if not isinstance(parameter.tag,str): continue
+            parameterIndex.setdefault((parameterList.tag,parameter.tag),parameter)
+    return parameterListIndex, parameterIndex
+
+#
+# Returns the (parameterListName, parameterName) pairs of the parameters whose
+# instances differ between the trees with roots rootA and rootB (either of
+# which may be None). Parameter lists without parameters that are present in
+# only one of the trees are reported as (parameterListName, None).
+#
+def getChangedParameters(rootA,rootB):
+    parametersA = getParameterInstanceStrings(rootA)
+    parametersB = getParameterInstanceStrings(rootB)
+    changes = []
+    for parameterListName in dict.fromkeys(list(parametersA) + list(parametersB)):
+        if((parameterListName in parametersA) != (parameterListName in parametersB)):
+            parameters = parametersA.get(parameterListName) or parametersB.get(parameterListName)
+            if(len(parameters) == 0): changes.append((parameterListName,None))
+        listA = parametersA.get(parameterListName,{})
+        listB = parametersB.get(parameterListName,{})
+        for parameterName in dict.fromkeys(list(listA) + list(listB)):
+            if(listA.get(parameterName) != listB.get(parameterName)):
+                changes.append((parameterListName,parameterName))
+    return changes
+
+def getParameterInstanceStrings(root):
+    parameters = {}
+    if(root == None): return parameters
+    for parameterList in root:
+        if not isinstance(parameterList.tag,str): continue
+        instances = parameters.setdefault(parameterList.tag,{})
+        for parameter in parameterList:
+            if not isinstance(parameter.tag,str): continue
+            instances.setdefault(parameter.tag,[]).append(ET.tostring(parameter,with_tail = False))
+    return parameters
+
+#
+# The body of the thread started by XML_ParameterListArray.startWatcher
+#
+def watchParameterListArray(xml_ParameterListArray,interval,callback,stop):
+    while(not stop.wait(interval)):
         try:
-            float(strVal)
-            if(strVal.find(".") >= 0) : return float(strVal) 
-            else:                       return int(strVal)
-        except ValueError:
-            if(strVal in TRUE_VALS):
-                return True 
-            if(strVal in FALSE_VALS) : 
-                return False 
-            return strVal 
+            changes = xml_ParameterListArray.reloadIfChanged()
+        except (OSError,ET.XMLSyntaxError):
+            continue
+        if(len(changes) != 0 and callback != None): callback(changes)
+
+def decodeBool(strVal):
+    if(strVal in TRUE_VALS) : return True
+    if(strVal in FALSE_VALS): return False
+    raise ValueError("type inconsistent with value specified",strVal)
+
+# Scalar type attribute values -> the conversion of the value attribute string 
+
+TYPE_CONVERTERS = {"float" : float, "double" : float, "int" : int, "long" : int, "bool" : decodeBool}
+
+# Types of the decoded values cached by getParameterValue (array values are mutable, and not cached)
+
+CACHED_VALUE_TYPES = frozenset((float,int,bool,str))
+
+#
+# Returns the Python value of the string strVal. If valType is not specified
+# (or is not a supported type) the type is inferred from strVal.
+#
+def decodeValue(valType,strVal,paramElement = None,encoding = None):
+    if(valType in ARRAY_TYPES):
+        return decodeArray(valType,strVal,encoding,paramElement)
+    
+    if(valType != None) : 
+        try:
+            if(valType == "string"): return strVal
+            if(valType == "float") : return float(strVal)
+            if(valType == "double"): return float(strVal)
+            if(valType == "int")   : return int(strVal)
+            if(valType == "long")  : return int(strVal)
+            if(valType == "bool")  : 
+                if(strVal in TRUE_VALS) : return True
+                if(strVal in FALSE_VALS): return False
+        except:
+            raise ValueError("type inconsistent with value specified or type un-supported",\
+                             paramElement).with_traceback(sys.exc_info()[2])
+    
+    try:
+        floatVal = float(strVal)
+        if(strVal.find(".") >= 0) : return floatVal
+        else:                       return int(strVal)
+    except ValueError:
+        if(strVal in TRUE_VALS):
+            return True 
+        if(strVal in FALSE_VALS) : 
+            return False 
+        return strVal 
+    
+        
+#
+# Returns the array value of type valType (a key of ARRAY_TYPES) specified by strVal,
+# a NumPy array if NumPy is available and an array.array otherwise. The values are
+# decoded directly into the array. (NumPy clamps integers outside of the int64 
+# range to its bounds, so integer arrays containing a bound are checked against
+# the exact values; such values raise the ValueError, as does any invalid value.)
+#
+def decodeArray(valType,strVal,encoding = None,paramElement = None):
+    typeCode, dtype = ARRAY_TYPES[valType]
+    try:
+        if(encoding == "base64"):
+            return bytesToArray(base64.b64decode(strVal,validate = True),valType)
+        
+        if(encoding != None):
+            raise ValueError("unsupported array encoding",encoding)
+        if(np != None):
+            if(len(strVal.strip()) == 0): return np.empty(0,dtype = dtype)
+            values = np.fromstring(strVal,dtype = dtype,sep = " ")
+            if(typeCode == "q" and (values.max() == INT64_MAX or values.min() == INT64_MIN)):
+                array.array(typeCode,map(int,strVal.split()))
+            return values
+        if(typeCode == "d"): return array.array(typeCode,map(float,strVal.split()))
+        return array.array(typeCode,map(int,strVal.split()))
+    except (ValueError, TypeError, OverflowError, binascii.Error):
+        raise ValueError("type inconsistent with value specified or type un-supported",\
+                         paramElement).with_traceback(sys.exc_info()[2])
+
+#
+# Returns float or int, the element type of a one dimensional NumPy array or 
+# array.array value, and None if value is not such an array.
+#
+def getArrayElementType(value):
+    if(np != None and isinstance(value,np.ndarray)):
+        if(value.ndim != 1): return None
+        if(value.dtype.kind == "f"):  return float
+        if(value.dtype.kind in "iu"): return int
+        return None
+    if(isinstance(value,array.array)):
+        if(value.typecode in "fd"): return float
+        if(value.typecode in "bBhHiIlLqQ"): return int
+    return None
+
+#
+# Returns the string representation of the array value with elements of type
+# elementType (float or int), using the same formats as scalar values. 
+#
+def encodeArray(value,elementType,encoding = None):
+    if(encoding == "base64"):
+        return base64.b64encode(arrayToBytes(value,elementType)).decode("ascii")
+    
+    if(encoding != None):
+        raise Exception("Unacceptable array encoding ",encoding)
+    if(elementType is float): return " ".join(map('{0:16.15e}'.format,value.tolist()))
+    return " ".join(map('{0:d}'.format,value.tolist()))
+
+#
+# Conversion of arrays with elements of type elementType to and from their 
+# little-endian raw bytes
+#
+def arrayToBytes(value,elementType):
+    if(elementType is float): typeCode, dtype = ARRAY_TYPES["double[]"]
+    else:                     typeCode, dtype = ARRAY_TYPES["long[]"]
+    if(np != None and isinstance(value,np.ndarray)):
+        return value.astype(dtype,copy = False).tobytes()
+    values = array.array(typeCode,value)
+    if(sys.byteorder == "big"): values.byteswap()
+    return values.tobytes()
+
+def bytesToArray(data,valType):
+    typeCode, dtype = ARRAY_TYPES[valType]
+    if(np != None): return np.frombuffer(bytearray(data),dtype = dtype)
+    values = array.array(typeCode)
+    values.frombytes(data)
+    if(sys.byteorder == "big"): values.byteswap()
+    return values
+
+#
+# Raises the ValueError of lxml if valStr cannot be set as an attribute value
+# (e.g. contains characters that are not allowed in XML).
+#
+ATTRIBUTE_CHECK_ELEMENT = ET.Element("check")
+
+def checkAttributeValue(valStr):
+    ATTRIBUTE_CHECK_ELEMENT.set("value",valStr)
+
+#
+# Appends element to parent, moving the whitespace that precedes the closing 
+# tag of parent so that the indentation of a parsed file is maintained.
+#
+def appendElement(parent,element):
+    if(len(parent) != 0):
+        last = parent[-1]
+        element.tail = last.tail
+        if(len(parent) > 1): last.tail = parent[-2].tail
+        else:                last.tail = parent.text
+    parent.append(element)
+
+#
+# Returns the Python representation of a parameter element; the decoded value
+# if the value attribute is specified, otherwise a dictionary of its child
+# parameters, otherwise the dictionary {TEXT_KEY : text} of its (stripped)
+# text, or None if there is no text. (The text is kept distinct from a string
+# value, so that createFromDict(..) restores it as text.)
+#
+def elementToValue(paramElement):
+    strVal = paramElement.get("value",None)
+    if(strVal != None):
+        return decodeValue(paramElement.get("type",None),strVal,paramElement,paramElement.get("encoding",None))
+    
+    if(len(paramElement) != 0):
+        childValues = elementChildrenToDict(paramElement)
+        if(len(childValues) != 0): return childValues
+        
+    if(paramElement.text == None): return None
+    text = paramElement.text.strip()
+    if(len(text) == 0): return None
+    return {TEXT_KEY : text}
+
+#
+# Returns a dictionary tag -> elementToValue(child) of the children of element.
+# The values of children with identical tags are collected in a list.
+#
+def elementChildrenToDict(element):
+    values = {}
+    for child in element:
+        if not isinstance(child.tag,str): continue
+        values.setdefault(child.tag,[]).append(elementToValue(child))
+    for tag, instances in values.items():
+        if(len(instances) == 1): values[tag] = instances[0]
+    return values
+    
+        
+#
+# Returns the ElementTree of the XML file fileName. If parameterLists is
+# specified, the parameter lists whose names are not in parameterLists are
+# removed as soon as they have been parsed, and parsing stops once each of
+# the specified parameter lists has been read. Only the first instance of a
+# repeated parameter list is kept, so the tree does not depend on where in
+# the file the others occur.
+#
+# (The files are parsed with huge_tree enabled, as the values of large array 
+# parameters exceed the default libxml2 limit on the size of an attribute.)
+#
+def parseParameterListArray(fileName, parameterLists = None):
+    if(parameterLists == None):
+        return ET.parse(fileName,ET.XMLParser(huge_tree = True))
+    
+    wanted    = frozenset(parameterLists)
+    remaining = set(wanted)
+    root      = None
+    for event, element in ET.iterparse(fileName, events=("end",), huge_tree = True):
+        parent = element.getparent()
+        if(parent == None): 
+            root = element
+            continue
+        if(parent.getparent() != None): continue
+        root = parent
+        
+        if(element.tag in remaining):
+            remaining.discard(element.tag)
+            if(len(remaining) == 0):
+                # Remove the (partially) parsed elements that follow 
+                while(element.getnext() != None):
+                    parent.remove(element.getnext())
+                break
+        else:
+            element.clear()
+            parent.remove(element)
+            
+    return ET.ElementTree(root)
+
+#
+# Streaming access to the XML file fileName; the file is parsed incrementally
+# and each parameter list is discarded once it has been processed, so that
+# memory use does not grow with the size of the file.
+#
+# If parameterLists (a collection of parameter list names) is specified only
+# those parameter lists are processed, and parsing stops once each of them
+# has been encountered.
+#
+# iterParameterLists yields (parameterListName, parameterDict) with the
+# parameterDict in the form returned by toDict(), while iterParameters yields
+# (parameterListName, parameterName, value) for each parameter instance.
+#
+def iterParameterLists(fileName, parameterLists = None):
+    for parameterList in iterParameterListElements(fileName,parameterLists):
+        yield parameterList.tag, elementChildrenToDict(parameterList)
+        
+def iterParameters(fileName, parameterLists = None):
+    for parameterList in iterParameterListElements(fileName,parameterLists):
+        for parameter in parameterList:
+            if not isinstance(parameter.tag,str): continue
+            yield parameterList.tag, parameter.tag, elementToValue(parameter)
+
+#
+# Yields the parameter list elements of fileName as their end tags are parsed.
+# An element is cleared and removed from the tree once control returns to the
+# generator, so it must not be retained by the caller.
+#
+def iterParameterListElements(fileName, parameterLists = None):
+    wanted    = None
+    remaining = None
+    if(parameterLists != None): 
+        wanted    = frozenset(parameterLists)
+        remaining = set(wanted)
+        
+    for event, element in ET.iterparse(fileName, events=("end",), huge_tree = True):
+        parent = element.getparent()
+        if(parent == None or parent.getparent() != None): continue
+        
+        if(wanted == None or element.tag in wanted):
+            yield element
+            if(remaining != None):
+                remaining.discard(element.tag)
+                if(len(remaining) == 0): return
+                
+        element.clear()
+        while(element.getprevious() != None):
+            del parent[0]
+
+#
+# Writes a parameter list array with root listArrayName to fileObject (a file
+# name or binary file-like object), one parameter list at a time, so that the
+# whole document is never held in memory. parameterLists is an iterable of
+# (parameterListName, parameterDict) pairs, as yielded by iterParameterLists,
+# or of parameter list elements.
+#
+def outputParameterListsToStream(fileObject, listArrayName, parameterLists, prettyPrint = False):
+    formatter = XML_ParameterListArray()
+    with ET.xmlfile(fileObject, encoding="utf-8") as xmlFile:
+        xmlFile.write_declaration()
+        with xmlFile.element(listArrayName):
+            for parameterList in parameterLists:
+                if(not ET.iselement(parameterList)):
+                    parameterListName, parameterDict = parameterList
+                    parameterList = ET.Element(parameterListName)
+                    formatter.appendDictElements(parameterList,parameterDict)
+                parameterList.tail = None
+                if(prettyPrint): 
+                    ET.indent(parameterList, level = 1)
+                    xmlFile.write("\n  ")
+                xmlFile.write(parameterList)
+            if(prettyPrint): xmlFile.write("\n")
+
+#
+# Returns the dictionary of decoded parameter values (see toDict) of the
+# parameter list array in the XML file fileName.
+#
+# If useCacheFile is True the dictionary is read from the cache file
+# fileName + CACHE_FILE_SUFFIX when that cache is current, i.e. was created
+# from a file with the same path, modification time and size. Otherwise the
+# XML file is parsed and, if possible, the cache file is (re)written. The
+# cache is stored in the marshal format, so no code is executed when
+# it is loaded.
+#
+def loadParameterDict(fileName, useCacheFile = True):
+    if(not useCacheFile):
+        return XML_ParameterListArray(fileName).toDict()
+    
+    cacheKey      = getCacheFileKey(fileName)
+    parameterDict = readCacheFile(fileName,cacheKey)
+    if(parameterDict != None): return parameterDict
+    
+    parameterDict = XML_ParameterListArray(fileName).toDict()
+    writeCacheFile(fileName,cacheKey,parameterDict)
+    return parameterDict
+
+#
+# Loads the files fileNames concurrently, with at most limit of them being
+# parsed at any time, and returns the list of XML_ParameterListArray
+# instances in the order of fileNames. The remaining arguments are those of
+# XML_ParameterListArray.aload.
+#
+async def aloadParameterListArrays(fileNames, limit = 8, useIndex = False, parameterLists = None,\
+                                   threadSafe = False, executor = None):
+    semaphore = asyncio.Semaphore(limit)
+    async def load(fileName):
+        async with semaphore:
+            return await XML_ParameterListArray.aload(fileName,useIndex,parameterLists,threadSafe,executor)
+    return await asyncio.gather(*[load(fileName) for fileName in fileNames])
+
+#
+# Returns the (modification time, size) of fileName, used to detect a change
+# to the file since it was loaded
+#
+def getFileStamp(fileName):
+    fileStat = os.stat(fileName)
+    return (fileStat.st_mtime_ns,fileStat.st_size)
+
+def getCacheFileKey(fileName):
+    fileStat = os.stat(fileName)
+    return (os.path.abspath(fileName),fileStat.st_mtime_ns,fileStat.st_size)
+
+def getCacheFileHeader():
+    return CACHE_FILE_MAGIC + bytes((CACHE_FILE_VERSION,sys.version_info[0],sys.version_info[1]))
+
+#
+# Returns the cached parameter dictionary, or None if the cache file does not
+# exist, is unreadable, or is stale with respect to cacheKey.
+#
+def readCacheFile(fileName,cacheKey):
+    header = getCacheFileHeader()
+    try:
+        with open(fileName + CACHE_FILE_SUFFIX,"rb") as cacheFile:
+            data = cacheFile.read()
+    except OSError:
+        return None
+    if(data[:len(header)] != header): return None
+    
+    try:
+        fileKey, hasArrays, parameterDict = marshal.loads(data[len(header):])
+    except (ValueError, EOFError, TypeError):
+        return None
+    if(tuple(fileKey) != cacheKey): return None
+    if(hasArrays): return tuplesToArrays(parameterDict)
+    return parameterDict
+
+#
+# Writes the cache file, replacing any existing one atomically. Failure to
+# write the cache (e.g. a read-only directory) is not an error.
+#
+def writeCacheFile(fileName,cacheKey,parameterDict):
+    cacheFileName = fileName + CACHE_FILE_SUFFIX
+    tmpFileName   = cacheFileName + "." + str(os.getpid())
+    arraysFound   = []
+    parameterDict = arraysToTuples(parameterDict,arraysFound)
+    try:
+        with open(tmpFileName,"wb") as cacheFile:
+            cacheFile.write(getCacheFileHeader())
+            cacheFile.write(marshal.dumps((cacheKey,len(arraysFound) != 0,parameterDict)))
+        os.replace(tmpFileName,cacheFileName)
+    except OSError:
+        try:
+            os.remove(tmpFileName)
+        except OSError:
+            pass
+
+#
+# Array values, which marshal does not support, are stored in the cache as
+# tuples (ARRAY_TYPE_NAME, valType, little-endian raw bytes); tuples do not
+# otherwise occur in a parameter dictionary.
+#
+ARRAY_TYPE_NAME = "XML_ParameterListArray.array"
+
+def arraysToTuples(value,arraysFound):
+    if(type(value) is dict): 
+        return {name : arraysToTuples(v,arraysFound) for name, v in value.items()}
+    if(type(value) is list): 
+        return [arraysToTuples(v,arraysFound) for v in value]
+    elementType = getArrayElementType(value)
+    if(elementType == None): return value
+    
+    arraysFound.append(True)
+    valType = "double[]" if elementType is float else "long[]"
+    return (ARRAY_TYPE_NAME,valType,arrayToBytes(value,elementType))
+
+def tuplesToArrays(value):
+    if(type(value) is dict): 
+        return {name : tuplesToArrays(v) for name, v in value.items()}
+    if(type(value) is list): 
+        return [tuplesToArrays(v) for v in value]
+    if(type(value) is tuple and len(value) == 3 and value[0] == ARRAY_TYPE_NAME):
+        return bytesToArray(value[2],value[1])
+    return value
     
         
 if __name__ == '__main__':
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                    XML_ParameterListArrayBenchmark.py
+#
+# Times the principal operations of XML_ParameterListArray on synthetic
+# parameter files of several sizes, and reports the results as JSON so that
+# runs with different versions can be compared.
+#
+# Usage:
+#
+#   python3 XML_ParameterListArrayBenchmark.py                      (default scales)
+#   python3 XML_ParameterListArrayBenchmark.py --scales 10x10 100000x10 100x1000 \
+#                                              --output baseline.json
+#
+# A scale LxP is a file of L parameter lists of P parameters each; each
+# scale is run without, and (unless --no-children) with, child parameters.
+# Each run is made in a new process, so that its maxResidentBytes is the
+# peak of that run alone.
+#
+# Only the XML_ParameterListArray member functions of the original module
+# are used, so that the benchmark runs against every version of it; the
+# [index] measurements are made only if the constructor has a useIndex
+# argument.
+#
+#############################################################################
+#
+# Copyright  2025- Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import inspect
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import multiprocessing
+
+import lxml.etree as ET
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from XML_ParameterListArray import XML_ParameterListArray
+
+INDEX_SUPPORTED = "useIndex" in inspect.signature(XML_ParameterListArray.__init__).parameters
+
+DEFAULT_SCALES = ("10x10", "100x100", "1000x100", "10000x10", "100x1000")
+
+# Every CHILD_PARAMETER_STRIDE-th parameter of a file with child parameters has
+# CHILD_PARAMETER_COUNT children in place of a value.
+
+CHILD_PARAMETER_STRIDE = 10
+CHILD_PARAMETER_COUNT  = 3
+
+def getParameterListName(listIndex):
+    return "List" + str(listIndex)
+
+def getParameterName(parameterIndex):
+    return "p" + str(parameterIndex)
+
+def getParameterValue(listIndex, parameterIndex):
+    kind = parameterIndex % 4
+    if(kind == 0): return listIndex + parameterIndex/1000.0
+    if(kind == 1): return listIndex*1000 + parameterIndex
+    if(kind == 2): return (parameterIndex % 3 == 0)
+    return "value_" + str(parameterIndex)
+
+def hasChildren(parameterIndex, children):
+    return children and (parameterIndex % CHILD_PARAMETER_STRIDE == CHILD_PARAMETER_STRIDE - 1)
+
+#
+# Returns the type and value attributes of value, as assigned by setParameterValueCPP
+#
+def getTypeAndValue(value):
+    if(type(value) is bool):  return {"type" : "bool",   "value" : "true" if value else "false"}
+    if(type(value) is float): return {"type" : "double", "value" : '{0:16.15e}'.format(value)}
+    if(type(value) is int):   return {"type" : "long",   "value" : '{0:d}'.format(value)}
+    return {"type" : "string", "value" : value}
+
+#
+# Writes the synthetic parameter file fileName, one parameter list at a time
+#
+def createParameterFile(fileName, listCount, parameterCount, children):
+    with ET.xmlfile(fileName,encoding = "utf-8") as xmlFile:
+        xmlFile.write_declaration()
+        with xmlFile.element("Parameters"):
+            for listIndex in range(listCount):
+                parameterList = ET.Element(getParameterListName(listIndex))
+                for parameterIndex in range(parameterCount):
+                    if(hasChildren(parameterIndex,children)):
+                        parameter = ET.SubElement(parameterList,getParameterName(parameterIndex))
+                        for k in range(CHILD_PARAMETER_COUNT):
+                            ET.SubElement(parameter,"c" + str(k),getTypeAndValue(float(k)))
+                    else:
+                        ET.SubElement(parameterList,getParameterName(parameterIndex),\
+                                      getTypeAndValue(getParameterValue(listIndex,parameterIndex)))
+                ET.indent(parameterList,level = 1)
+                xmlFile.write("\n  ")
+                xmlFile.write(parameterList)
+            xmlFile.write("\n")
+
+#
+# Returns the best of repeat timings (seconds) of function()
+#
+def timeFunction(function, repeat):
+    best = None
+    for k in range(repeat):
+        gc.collect()
+        start   = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if(best == None or elapsed < best): best = elapsed
+    return best
+
+#
+# Returns the peak size (bytes) of the Python allocations made by function().
+# (Memory allocated by libxml2 is not traced; see maxResidentBytes.)
+#
+# maxResidentBytes is the peak resident size of the process so far; as each
+# scale is run in its own process, it is that of the scale's run up to the
+# point of the call.
+#
+def tracedPeak(function):
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+def maxResidentBytes():
+    if(resource == None): return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss*1024
+
+#
+# Runs the benchmarks of one synthetic file and returns the list of result records
+#
+def benchmarkScale(directory, listCount, parameterCount, children, operationCount, repeat, seed):
+    fileName = os.path.join(directory,"bench_%dx%d%s.xml" % (listCount,parameterCount,"_children" if children else ""))
+    createParameterFile(fileName,listCount,parameterCount,children)
+    scale   = {"lists" : listCount, "parameters" : parameterCount, "children" : children,\
+               "fileBytes" : os.path.getsize(fileName)}
+    results = []
+
+    def record(operation, count, seconds, **extra):
+        result = dict(scale, operation = operation, count = count, seconds = seconds,\
+                      opsPerSecond = (count/seconds if seconds > 0 else None))
+        result.update(extra)
+        results.append(result)
+
+    generator = random.Random(seed)
+    valued    = [p for p in range(parameterCount) if not hasChildren(p,children)]
+    withChild = [p for p in range(parameterCount) if hasChildren(p,children)]
+    lookups   = [(getParameterName(generator.choice(valued)),getParameterListName(generator.randrange(listCount))) \
+                 for k in range(operationCount)]
+    defaults  = [(parameterName if k % 2 == 0 else parameterName + "_missing",parameterListName) \
+                 for k, (parameterName, parameterListName) in enumerate(lookups)]
+
+    parseSeconds = timeFunction(lambda : XML_ParameterListArray(fileName),repeat)
+    record("__init__",1,parseSeconds,\
+           tracedPeakBytes = tracedPeak(lambda : XML_ParameterListArray(fileName)),\
+           maxResidentBytes = maxResidentBytes())
+
+    for useIndex in ((False,True) if INDEX_SUPPORTED else (False,)):
+        suffix = "[index]" if useIndex else ""
+        if(useIndex): xml_ParameterListArray = XML_ParameterListArray(fileName,useIndex = True)
+        else:         xml_ParameterListArray = XML_ParameterListArray(fileName)
+
+        def getValues():
+            for parameterName, parameterListName in lookups:
+                xml_ParameterListArray.getParameterValue(parameterName,parameterListName)
+        record("getParameterValue" + suffix,len(lookups),timeFunction(getValues,repeat))
+
+        def getValuesOrDefault():
+            for parameterName, parameterListName in defaults:
+                xml_ParameterListArray.getParameterValueOrDefault(parameterName,parameterListName,None)
+        record("getParameterValueOrDefault" + suffix,len(defaults),timeFunction(getValuesOrDefault,repeat))
+
+        def setValues():
+            for parameterName, parameterListName in lookups:
+                value = xml_ParameterListArray.getParameterValue(parameterName,parameterListName)
+                xml_ParameterListArray.setParameterValueCPP(value,parameterName,parameterListName)
+        record("setParameterValueCPP" + suffix,len(lookups),timeFunction(setValues,repeat),\
+               note = "includes a getParameterValue per set")
+
+        parameterListNames = [parameterListName for parameterName, parameterListName in lookups]
+        def getNames():
+            for parameterListName in parameterListNames:
+                xml_ParameterListArray.getParameterNames(parameterListName)
+        record("getParameterNames" + suffix,len(parameterListNames),timeFunction(getNames,repeat))
+
+        if(len(withChild) != 0):
+            additions = [(getParameterName(generator.choice(withChild)),getParameterListName(generator.randrange(listCount))) \
+                         for k in range(min(operationCount,1000))]
+            def addChildren():
+                for k, (parameterName, parameterListName) in enumerate(additions):
+                    xml_ParameterListArray.addParameterChild(float(k),"added" + str(k),parameterName,parameterListName)
+            record("addParameterChild" + suffix,len(additions),timeFunction(addChildren,1))
+
+    outputName = os.path.join(directory,"output.xml")
+    record("outputToFile",1,timeFunction(lambda : xml_ParameterListArray.outputToFile(outputName),repeat))
+    os.remove(outputName)
+    os.remove(fileName)
+    return results
+
+def parseScale(scale):
+    try:
+        listCount, parameterCount = (int(n) for n in scale.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("scale must be of the form LISTSxPARAMETERS : " + scale)
+    return listCount, parameterCount
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmarks of XML_ParameterListArray operations")
+    parser.add_argument("--scales", nargs = "+", type = parseScale, default = [parseScale(s) for s in DEFAULT_SCALES],\
+                        help = "file sizes LISTSxPARAMETERS (default: " + " ".join(DEFAULT_SCALES) + ")")
+    parser.add_argument("--no-children", action = "store_true", help = "skip the files with child parameters")
+    parser.add_argument("--operations", type = int, default = 10000, help = "operations timed per measurement")
+    parser.add_argument("--repeat", type = int, default = 3, help = "timings per measurement (the best is reported)")
+    parser.add_argument("--seed", type = int, default = 1, help = "random seed of the parameter lookups")
+    parser.add_argument("--directory", default = None, help = "directory for the synthetic files")
+    parser.add_argument("--output", default = None, help = "JSON output file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    report = {"benchmark" : "XML_ParameterListArray",\
+              "timestamp" : time.strftime("%Y-%m-%dT%H:%M:%S%z"),\
+              "python"    : platform.python_version(),\
+              "lxml"      : ".".join(str(n) for n in ET.LXML_VERSION),\
+              "libxml2"   : ".".join(str(n) for n in ET.LIBXML_VERSION),\
+              "platform"  : platform.platform(),\
+              "operations": args.operations,\
+              "repeat"    : args.repeat,\
+              "results"   : []}
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(dir = args.directory) as directory:
+        for listCount, parameterCount in args.scales:
+            for children in ((False,) if args.no_children else (False,True)):
+                print("XML_ParameterListArrayBenchmark : %dx%d%s" % (listCount,parameterCount,\
+                      " with children" if children else ""),file = sys.stderr)
+                with context.Pool(1) as pool:
+                    report["results"].extend(pool.apply(benchmarkScale,(directory,listCount,parameterCount,children,\
+                                                                        args.operations,args.repeat,args.seed)))
+
+    if(args.output == None):
+        json.dump(report,sys.stdout,indent = 2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output,"w") as outputFile:
+            json.dump(report,outputFile,indent = 2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                         XML_ParameterSchema.py
+#
+# The declared type, bounds and default of the parameters of an XML
+# parameter list array, for validating parameter files and reading them
+# without inferring parameter types.
+#
+#############################################################################
+#
+# Copyright  2025- Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from XML_ParameterListArray import XML_ParameterListArray
+from XML_ParameterListArray import decodeBool, decodeArray, getArrayElementType
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Schema parameter types -> the values of the type attribute consistent with them.
+# Scalar parameters are declared with the Python type of their value, and array
+# parameters with the name of the array type.
+
+SCHEMA_TYPES = {int : ("int","long"), float : ("float","double"), bool : ("bool",), str : ("string",),
+                "double[]" : ("double[]","float[]"), "long[]" : ("long[]","int[]")}
+
+#
+# A schema is built from a reference parameter file (or XML_ParameterListArray),
+# each parameter with a value taking the type of its value and that value as
+# its default, and/or by declaring parameters with addParameter(..).
+#
+# validate(..) checks a loaded parameter list array against the schema in a
+# single pass over its tree, and either raises an exception reporting every
+# violation found or returns an XML_ValidatedParameters, whose values are
+# read with the converters of the declared types.
+#
+# Example:
+#
+#   schema = XML_ParameterSchema("reference.xml")
+#   schema.addParameter(float,"tolerance","SolverParameters",minimum = 0.0,maximum = 1.0)
+#   schema.addParameter(int,"meshSize","GridParameters",minimum = 2)
+#
+#   parameters = schema.validate(XML_ParameterListArray("job.xml"))
+#   tolerance  = parameters.getParameterValue("tolerance","SolverParameters")
+#
+# If allowUnknownParameters is False, parameters in parameter lists of the
+# schema that are not themselves in the schema are reported as violations.
+#
+class XML_ParameterSchema:
+    def __init__(self, reference = None, allowUnknownParameters = True):
+        self.parameters = {}
+        self.allowUnknownParameters = allowUnknownParameters
+        if(reference != None): self.addReferenceParameters(reference)
+
+    #
+    # Adds the parameters (with a value attribute) of the reference parameter
+    # list array, or file, to the schema as optional parameters with default
+    # values the reference values. The first instance of a repeated parameter
+    # is used.
+    #
+    def addReferenceParameters(self, reference):
+        if(not isinstance(reference,XML_ParameterListArray)):
+            reference = XML_ParameterListArray(reference)
+        for parameterList in reference.root:
+            if not isinstance(parameterList.tag,str): continue
+            for parameter in parameterList:
+                if not isinstance(parameter.tag,str): continue
+                if(not reference.hasValueSpecified(parameter)): continue
+                if((parameterList.tag,parameter.tag) in self.parameters): continue
+                value = reference.getValue(parameter)
+                self.addParameter(getSchemaType(value),parameter.tag,parameterList.tag,default = value,required = False)
+
+    #
+    # Declares the parameter parameterName of parameterListName with type
+    # valueType (a key of SCHEMA_TYPES). A parameter without a default value is
+    # required unless required is specified as False, in which case its value
+    # is None when it is not specified. The bounds minimum and maximum (of
+    # numeric and array parameters) are inclusive.
+    #
+    def addParameter(self, valueType, parameterName, parameterListName, default = None,\
+                     minimum = None, maximum = None, required = None):
+        if(valueType not in SCHEMA_TYPES):
+            raise Exception("\n Unsupported schema parameter type : " + str(valueType) \
+                             + "\n ParmeterList : " + parameterListName \
+                             + "\n Parameter    : " + parameterName)
+        if(required == None): required = (default is None)
+        self.parameters[(parameterListName,parameterName)] = \
+            XML_SchemaParameter(valueType,default,minimum,maximum,required)
+
+    def getParameterListNames(self):
+        return list(dict.fromkeys(parameterListName for parameterListName, parameterName in self.parameters))
+
+    #
+    # Returns the list of the violations of the schema by xml_ParameterListArray
+    # (an empty list if it is valid)
+    #
+    def getViolations(self, xml_ParameterListArray):
+        violations, instances = self.checkParameterListArray(xml_ParameterListArray)
+        return violations
+
+    #
+    # Returns the XML_ValidatedParameters of xml_ParameterListArray, or raises
+    # an exception listing all of the violations of the schema.
+    #
+    def validate(self, xml_ParameterListArray):
+        violations, instances = self.checkParameterListArray(xml_ParameterListArray)
+        if(len(violations) != 0):
+            raise Exception("\n Parameter schema violations (" + str(len(violations)) + ") \n " \
+                             + "\n ".join(violations))
+        return XML_ValidatedParameters(self.parameters,instances)
+
+    #
+    # The single pass over the tree: each parameter instance of a schema parameter
+    # list is checked against its declaration, and the first instance of each
+    # schema parameter is recorded. Required parameters without an instance are
+    # reported at the end.
+    #
+    def checkParameterListArray(self, xml_ParameterListArray):
+        violations = []
+        instances  = {}
+        schemaParameterLists = set(self.getParameterListNames())
+        for parameterList in xml_ParameterListArray.root:
+            if not isinstance(parameterList.tag,str): continue
+            if(parameterList.tag not in schemaParameterLists): continue
+            for parameter in parameterList:
+                if not isinstance(parameter.tag,str): continue
+                key = (parameterList.tag,parameter.tag)
+                schemaParameter = self.parameters.get(key)
+                if(schemaParameter == None):
+                    if(not self.allowUnknownParameters):
+                        violations.append(formatViolation(key,"parameter not in schema"))
+                    continue
+                violation = schemaParameter.check(parameter)
+                if(violation != None):
+                    violations.append(formatViolation(key,violation))
+                instances.setdefault(key,parameter)
+
+        for key, schemaParameter in self.parameters.items():
+            if(schemaParameter.required and key not in instances):
+                violations.append(formatViolation(key,"required parameter not specified"))
+        return violations, instances
+
+#
+# The declaration of a schema parameter, with the converter from the value
+# attribute of a parameter element to its value determined by valueType.
+#
+class XML_SchemaParameter:
+    __slots__ = ("valueType","default","minimum","maximum","required","converter")
+
+    def __init__(self, valueType, default, minimum, maximum, required):
+        self.valueType = valueType
+        self.default   = default
+        self.minimum   = minimum
+        self.maximum   = maximum
+        self.required  = required
+        self.converter = createConverter(valueType)
+
+    #
+    # Returns a description of the violation of the declaration by the parameter
+    # element, or None if there is none
+    #
+    def check(self, parameter):
+        strVal = parameter.get("value",None)
+        if(strVal == None): return "value attribute not specified"
+        typeName = parameter.get("type",None)
+        if(typeName != None and typeName not in SCHEMA_TYPES[self.valueType]):
+            return "type " + typeName + " inconsistent with schema type " + getSchemaTypeName(self.valueType)
+        try:
+            value = self.converter(parameter)
+        except Exception:
+            return "value " + repr(strVal) + " is not of schema type " + getSchemaTypeName(self.valueType)
+
+        if(self.minimum == None and self.maximum == None): return None
+        if(type(self.valueType) is str):
+            if(len(value) == 0): return None
+            if(np != None and isinstance(value,np.ndarray)): low, high = value.min(), value.max()
+            else:                                            low, high = min(value), max(value)
+        else:
+            low = high = value
+        if(self.minimum != None and low < self.minimum):
+            return "value " + str(low) + " less than minimum " + str(self.minimum)
+        if(self.maximum != None and high > self.maximum):
+            return "value " + str(high) + " greater than maximum " + str(self.maximum)
+        return None
+
+#
+# The parameters of a parameter list array validated against a schema. Values
+# are read with the converters of the declared types; a schema parameter that
+# is not specified has its default value.
+#
+# The parameter elements are those of the validated tree, so a value set (in
+# the tree) after validation is read as set, but is not re-validated.
+#
+class XML_ValidatedParameters:
+    def __init__(self, schemaParameters, instances):
+        self.schemaParameters = schemaParameters
+        self.instances        = instances
+
+    def getParameterValue(self, parameterName, parameterListName):
+        key = (parameterListName,parameterName)
+        schemaParameter = self.schemaParameters.get(key)
+        if(schemaParameter == None):
+            raise Exception("\n Parameter not found in schema \n ParmeterList : " + parameterListName \
+                             + "\n Parameter    : " + parameterName)
+        instance = self.instances.get(key)
+        if(instance == None): return schemaParameter.default
+        return schemaParameter.converter(instance)
+
+    def isParameterSpecified(self, parameterName, parameterListName):
+        return (parameterListName,parameterName) in self.instances
+
+    #
+    # Returns the dictionary (parameterListName, parameterName) -> value of all
+    # of the schema parameters
+    #
+    def getParameterValues(self):
+        parameterValues = {}
+        for (parameterListName, parameterName), schemaParameter in self.schemaParameters.items():
+            instance = self.instances.get((parameterListName,parameterName))
+            if(instance == None):
+                parameterValues[(parameterListName,parameterName)] = schemaParameter.default
+            else:
+                parameterValues[(parameterListName,parameterName)] = schemaParameter.converter(instance)
+        return parameterValues
+
+#
+# Returns the function converting a parameter element to its value of type valueType
+#
+def createConverter(valueType):
+    if(valueType is bool):  return lambda parameter : decodeBool(parameter.get("value"))
+    if(valueType is int):   return lambda parameter : int(parameter.get("value"))
+    if(valueType is float): return lambda parameter : float(parameter.get("value"))
+    if(valueType is str):   return lambda parameter : parameter.get("value")
+    return lambda parameter : decodeArray(valueType,parameter.get("value"),parameter.get("encoding",None),parameter)
+
+#
+# Returns the schema type of value
+#
+def getSchemaType(value):
+    elementType = getArrayElementType(value)
+    if(elementType is float): return "double[]"
+    if(elementType is int):   return "long[]"
+    if(type(value) in SCHEMA_TYPES): return type(value)
+    raise Exception("\n No schema type for value of type : " + str(type(value)))
+
+def getSchemaTypeName(valueType):
+    if(type(valueType) is str): return valueType
+    return SCHEMA_TYPES[valueType][0]
+
+def formatViolation(key, violation):
+    return "ParameterList : " + key[0] + "  Parameter : " + key[1] + "  : " + violation
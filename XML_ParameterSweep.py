@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                         XML_ParameterSweep.py
+#
+# Generates the XML parameter files of a parameter sweep over a base
+# XML_ParameterListArray.
+#
+#############################################################################
+#
+# Copyright  2025- Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import io
+import os
+import re
+import copy
+import uuid
+import zipfile
+import concurrent.futures
+
+from XML_ParameterListArray import XML_ParameterListArray
+from XML_ParameterListArray import SET_TYPE_NAMES, SET_TYPE_NAMES_CPP, checkAttributeValue
+
+#
+# A sweep is specified by a base parameter list array and, for each of the
+# swept parameters, a sequence of values. The cases are either all
+# combinations of the values (mode = "product", the first parameter added
+# varying slowest) or the values taken in step (mode = "zip").
+#
+# The base tree is serialized once with placeholders in the value attributes
+# of the swept parameters, and the XML of each case is obtained by joining the
+# serialized segments with the (pre-formatted) values of the case. The output
+# of a case is identical to that of outputToFile(..) applied to a copy of the
+# base in which the swept values have been set with setParameterValueCPP
+# (or setParameterValue if cppTypes is False).
+#
+# The template (segments and placeholder columns) is created when the first
+# case is output and reused until a sweep parameter is added; call
+# clearTemplate() if the base is modified after a case has been output.
+#
+# Example:
+#
+#   sweep = XML_ParameterSweep("base.xml")
+#   sweep.addSweepParameter([0.1,0.2,0.4],"tolerance","SolverParameters")
+#   sweep.addSweepParameter([64,128],"meshSize","GridParameters")
+#   fileNames = sweep.outputToFiles("cases/case_{index:04d}.xml",workers = 8)
+#
+class XML_ParameterSweep:
+    def __init__(self, baseParameterListArray, sweepParameters = None, cppTypes = True):
+        if(isinstance(baseParameterListArray,XML_ParameterListArray)):
+            self.base = baseParameterListArray
+        else:
+            self.base = XML_ParameterListArray(baseParameterListArray)
+
+        self.typeNames       = SET_TYPE_NAMES_CPP if cppTypes else SET_TYPE_NAMES
+        self.sweepParameters = {}
+        self.template        = None
+        if(sweepParameters != None):
+            for (parameterListName, parameterName), values in sweepParameters.items():
+                self.addSweepParameter(values,parameterName,parameterListName)
+
+    #
+    # Adds the parameter parameterName of parameterListName to the sweep; values
+    # is the sequence of values it takes. Each value must have the type of the
+    # parameter's value in the base, and (as with setParameterValueCPP) a string
+    # value that lxml rejects as an attribute value raises its ValueError here.
+    #
+    def addSweepParameter(self, values, parameterName, parameterListName):
+        values        = list(values)
+        instance      = self.base.getParameterInstance(parameterName,parameterListName)
+        originalValue = self.base.getValue(instance)
+        valStrs = []
+        for value in values:
+            valStr, typeStr = self.base.getSetValueAndTypeAsString(value,originalValue,self.typeNames,\
+                                                                   None,parameterName,parameterListName,\
+                                                                   instance.get("encoding",None))
+            if(typeStr == None):
+                raise Exception("\n Parameter type cannot be swept \n ParmeterList : " + parameterListName \
+                                 + "\n Parameter    : " + parameterName)
+            checkAttributeValue(valStr)
+            valStrs.append(escapeAttributeValue(valStr).encode("utf-8"))
+        if(len(valStrs) == 0):
+            raise Exception("\n Empty sweep value specification \n ParmeterList : " + parameterListName \
+                             + "\n Parameter    : " + parameterName)
+
+        self.sweepParameters[(parameterListName,parameterName)] = (values,valStrs,typeStr)
+        self.template = None
+
+    def getCaseCount(self, mode = "product"):
+        sizes = self.getSweepSizes(mode)
+        if(mode == "zip"): return sizes[0] if len(sizes) != 0 else 0
+        caseCount = 1
+        for size in sizes: caseCount *= size
+        return caseCount
+
+    #
+    # Returns the dictionary (parameterListName, parameterName) -> value of the
+    # swept parameter values of case caseIndex.
+    #
+    def getCaseValues(self, caseIndex, mode = "product"):
+        valueIndices = getValueIndices(caseIndex,self.getSweepSizes(mode),mode)
+        caseValues   = {}
+        for key, valueIndex in zip(self.sweepParameters,valueIndices):
+            caseValues[key] = self.sweepParameters[key][0][valueIndex]
+        return caseValues
+
+    #
+    # Returns the XML (bytes) of case caseIndex
+    #
+    def getCaseXML(self, caseIndex, mode = "product"):
+        segments, columns = self.getTemplate()
+        return renderCase(segments,columns,self.getSweepSizes(mode),mode,caseIndex)
+
+    #
+    # Writes each case to the file fileNameFormat.format(index = caseIndex) and
+    # returns the list of file names. If workers is specified, the files are
+    # written by a pool of that number of processes.
+    #
+    def outputToFiles(self, fileNameFormat, mode = "product", workers = None):
+        segments, columns = self.getTemplate()
+        sizes     = self.getSweepSizes(mode)
+        caseCount = self.getCaseCount(mode)
+        fileNames = [fileNameFormat.format(index = caseIndex) for caseIndex in range(caseCount)]
+
+        if(workers == None or workers <= 1 or caseCount <= 1):
+            writeCaseFiles(segments,columns,sizes,mode,fileNames,0,caseCount)
+            return fileNames
+
+        chunkSize = max(1,caseCount//(4*workers))
+        with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = [executor.submit(writeCaseFiles,segments,columns,sizes,mode,fileNames[start:start+chunkSize],\
+                                       start,min(start+chunkSize,caseCount)) \
+                       for start in range(0,caseCount,chunkSize)]
+            for future in futures: future.result()
+        return fileNames
+
+    #
+    # Writes each case into the zip archive archiveName as the member
+    # fileNameFormat.format(index = caseIndex) and returns the member names.
+    #
+    def outputToArchive(self, archiveName, fileNameFormat = "case_{index:06d}.xml", mode = "product",\
+                        compression = zipfile.ZIP_DEFLATED):
+        segments, columns = self.getTemplate()
+        sizes       = self.getSweepSizes(mode)
+        memberNames = []
+        with zipfile.ZipFile(archiveName,"w",compression = compression) as archive:
+            for caseIndex in range(self.getCaseCount(mode)):
+                memberName = fileNameFormat.format(index = caseIndex)
+                archive.writestr(memberName,renderCase(segments,columns,sizes,mode,caseIndex))
+                memberNames.append(memberName)
+        return memberNames
+
+    def getSweepSizes(self, mode):
+        sizes = [len(valStrs) for values, valStrs, typeStr in self.sweepParameters.values()]
+        if(mode == "zip"):
+            if(len(set(sizes)) > 1):
+                raise Exception("\n Sweep values of unequal length specified for zip sweep : " + str(sizes))
+        elif(mode != "product"):
+            raise Exception("\n Unknown sweep mode : " + str(mode))
+        return sizes
+
+    def getTemplate(self):
+        if(self.template == None): self.template = self.createTemplate()
+        return self.template
+
+    def clearTemplate(self):
+        self.template = None
+
+    #
+    # Serializes a copy of the base with placeholder value attributes for the swept
+    # parameters, and splits it into the list of fixed segments and the list of
+    # the sweep parameter (column) indices of the placeholders between them.
+    #
+    def createTemplate(self):
+        tree   = copy.deepcopy(self.base.tree)
+        root   = tree.getroot()
+        prefix = "XPLA_SWEEP_" + uuid.uuid4().hex + "_"
+        for columnIndex, ((parameterListName, parameterName), (values, valStrs, typeStr)) \
+            in enumerate(self.sweepParameters.items()):
+            instance = root.find(parameterListName).find(parameterName)
+            instance.set("value",prefix + str(columnIndex))
+            instance.set("type",typeStr)
+
+        buffer = io.BytesIO()
+        tree.write(buffer, pretty_print=True, encoding="utf-8", xml_declaration=True)
+        xml    = buffer.getvalue()
+        pieces = re.split(re.escape(prefix.encode("utf-8")) + rb"(\d+)",xml)
+        keys     = list(self.sweepParameters)
+        segments = pieces[0::2]
+        columns  = []
+        for columnIndex in pieces[1::2]:
+            column = int(columnIndex)
+            columns.append((column,self.sweepParameters[keys[column]][1]))
+        return segments, columns
+
+#
+# Returns the indices into the sweep value sequences of case caseIndex
+#
+def getValueIndices(caseIndex, sizes, mode):
+    if(mode == "zip"): return [caseIndex]*len(sizes)
+    valueIndices = [0]*len(sizes)
+    for k in range(len(sizes)-1,-1,-1):
+        caseIndex, valueIndices[k] = divmod(caseIndex,sizes[k])
+    return valueIndices
+
+def renderCase(segments, columns, sizes, mode, caseIndex):
+    valueIndices = getValueIndices(caseIndex,sizes,mode)
+    pieces = [segments[0]]
+    for (column, valStrs), segment in zip(columns,segments[1:]):
+        pieces.append(valStrs[valueIndices[column]])
+        pieces.append(segment)
+    return b"".join(pieces)
+
+def writeCaseFiles(segments, columns, sizes, mode, fileNames, startIndex, endIndex):
+    for fileName, caseIndex in zip(fileNames,range(startIndex,endIndex)):
+        directory = os.path.dirname(fileName)
+        if(directory != ""): os.makedirs(directory,exist_ok = True)
+        with open(fileName,"wb") as caseFile:
+            caseFile.write(renderCase(segments,columns,sizes,mode,caseIndex))
+
+#
+# Escapes an attribute value as lxml does when serializing
+#
+ATTRIBUTE_ESCAPES = str.maketrans({"&" : "&amp;", "<" : "&lt;", ">" : "&gt;", '"' : "&quot;",\
+                                   "\n" : "&#10;", "\r" : "&#13;", "\t" : "&#9;"})
+
+def escapeAttributeValue(valStr):
+    return valStr.translate(ATTRIBUTE_ESCAPES)
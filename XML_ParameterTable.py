@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                         XML_ParameterTable.py
+#
+# A compact, read-only in-memory form of an XML parameter list array that
+# does not retain the lxml element tree.
+#
+#############################################################################
+#
+# Copyright  2025- Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import sys
+
+from XML_ParameterListArray import XML_ParameterListArray
+from XML_ParameterListArray import decodeValue, iterParameterListElements, loadParameterDict, TEXT_KEY
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#
+# The table holds, for each parameter list, the (interned) names of its
+# parameters and an XML_ParameterRecord of the decoded value, value string,
+# text and child parameters of (the first instance of) each parameter. Array values are
+# NumPy arrays (made read-only) or array.arrays. The getters have the names,
+# arguments and exceptions of those of XML_ParameterListArray; there are no
+# setters.
+#
+# A table is created from
+#
+#   an XML_ParameterListArray  : XML_ParameterTable(xml_ParameterListArray)
+#   an XML file                : XML_ParameterTable("case.xml", parameterLists = None, useCacheFile = False)
+#   a dictionary               : XML_ParameterTable(parameterDict), with parameterDict of the form
+#                                returned by XML_ParameterListArray.toDict() or loadParameterDict(..)
+#
+# An XML file is streamed one parameter list at a time, so its element tree is
+# never held in memory; with useCacheFile the table is created from the
+# dictionary returned by loadParameterDict(..), and the file is not parsed at
+# all when its cache file is current. (A dictionary does not record the
+# value attribute strings of non-string values, so getParameterValueOrText(..)
+# of such a parameter of a table created from a dictionary raises an exception.)
+#
+# As with XML_ParameterListArray, only the first instance of a repeated
+# parameter list is used.
+#
+class XML_ParameterTable:
+    __slots__ = ("parameterLists",)
+
+    def __init__(self, source = None, parameterLists = None, useCacheFile = False):
+        self.parameterLists = {}
+        if(source == None): return
+        if(isinstance(source,XML_ParameterListArray)):
+            self.addParameterListElements(source.root)
+        elif(isinstance(source,dict)):
+            self.addParameterDict(source)
+        elif(useCacheFile):
+            parameterDict = loadParameterDict(source)
+            if(parameterLists != None):
+                parameterLists = set(parameterLists)
+                parameterDict  = {name : value for name, value in parameterDict.items() if name in parameterLists}
+            self.addParameterDict(parameterDict)
+        else:
+            self.addParameterListElements(iterParameterListElements(source,parameterLists))
+
+    def addParameterListElements(self, parameterListElements):
+        for parameterList in parameterListElements:
+            if not isinstance(parameterList.tag,str): continue
+            if(parameterList.tag in self.parameterLists): continue
+            records = [elementToRecord(parameter) for parameter in parameterList \
+                       if isinstance(parameter.tag,str)]
+            self.parameterLists[sys.intern(parameterList.tag)] = XML_ParameterTableList(records)
+
+    def addParameterDict(self, parameterDict):
+        for parameterListName, parameters in parameterDict.items():
+            if(parameterListName in self.parameterLists): continue
+            if(type(parameters) is list): parameters = parameters[0]
+            self.parameterLists[sys.intern(parameterListName)] = \
+                XML_ParameterTableList(valuesToRecords(parameters))
+
+    def findParameterList(self, parameterListName):
+        parameterList = self.parameterLists.get(parameterListName)
+        if(parameterList == None):
+            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
+        return parameterList
+
+    def findParameter(self, parameterName, parameterListName):
+        record = self.findParameterList(parameterListName).parameters.get(parameterName)
+        if(record == None):
+            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
+                             + "\n Parameter    : " + parameterName)
+        return record
+
+    def getParameterValue(self, parameterName, parameterListName):
+        return self.findParameter(parameterName,parameterListName).getValue()
+
+    def getParameterValueOrDefault(self, parameterName, parameterListName, defaultValue):
+        record = self.findParameterList(parameterListName).parameters.get(parameterName)
+        if(record == None): return defaultValue
+        return record.getValue()
+
+    #
+    # As XML_ParameterListArray.getParameterValueOrText(..), returns the stripped
+    # value attribute string (not the decoded value), or if there is no value
+    # attribute, the stripped text.
+    #
+    def getParameterValueOrText(self, parameterName, parameterListName):
+        record = self.findParameter(parameterName,parameterListName)
+        if(record.value is None): return record.text
+        if(record.valueString is UNKNOWN_VALUE_STRING):
+            raise Exception("\n Value string not recorded (table created from a dictionary) \n ParmeterList : " \
+                             + parameterListName + "\n Parameter    : " + parameterName)
+        return record.valueString
+
+    def getParameterText(self, parameterName, parameterListName):
+        return self.findParameter(parameterName,parameterListName).text
+
+    def getParameterListNames(self):
+        return list(self.parameterLists)
+
+    def getParameterNames(self, parameterListName):
+        return list(self.findParameterList(parameterListName).parameterNames)
+
+    def isParameterList(self, parameterListName):
+        return parameterListName in self.parameterLists
+
+    def isParameter(self, parameterName, parameterListName):
+        return parameterName in self.findParameterList(parameterListName).parameters
+
+    def getParameterChildNames(self, parameterName, parameterListName):
+        return [child.name for child in self.findParameter(parameterName,parameterListName).children]
+
+    def getParameterChildValues(self, parameterChildName, parameterName, parameterListName):
+        record = self.findParameter(parameterName,parameterListName)
+        childValues = [child.getValue() for child in record.children if child.name == parameterChildName]
+        if(len(childValues) == 0):
+            raise Exception("\n Child parameter not found  \n ParmeterList   : " + parameterListName \
+                             + "\n Parameter      : "  + parameterName   \
+                             + "\n ChildParameter : " + parameterChildName)
+        return childValues
+
+#
+# The parameters of a parameter list: the names of all of its parameter
+# instances, in order, and the record of the first instance of each.
+#
+class XML_ParameterTableList:
+    __slots__ = ("parameterNames","parameters")
+
+    def __init__(self, records):
+        self.parameterNames = tuple(record.name for record in records)
+        self.parameters     = {}
+        for record in records:
+            self.parameters.setdefault(record.name,record)
+
+#
+# A parameter: its (interned) name, decoded value (None if it has no value
+# attribute), stripped value attribute string (None if empty, and
+# UNKNOWN_VALUE_STRING if not known), stripped text (None if empty) and the
+# tuple of the records of its child parameters.
+#
+class XML_ParameterRecord:
+    __slots__ = ("name","value","valueString","text","children")
+
+    def __init__(self, name, value, valueString, text, children):
+        self.name        = sys.intern(name)
+        self.value       = value
+        self.valueString = valueString
+        self.text        = text
+        self.children    = children
+
+    def getValue(self):
+        if(self.value is None):
+            raise ValueError("value attribute not specified in ",self.name)
+        return self.value
+
+NO_CHILDREN = ()
+
+# The value string of a record created from a (non-string) dictionary value
+
+UNKNOWN_VALUE_STRING = object()
+
+def elementToRecord(element):
+    value       = None
+    valueString = None
+    strVal      = element.get("value",None)
+    if(strVal != None):
+        value = freezeValue(decodeValue(element.get("type",None),strVal,element,element.get("encoding",None)))
+        if(len(strVal.strip()) != 0): valueString = strVal.strip()
+    text = None
+    if(element.text != None and len(element.text.strip()) != 0): text = element.text.strip()
+    children = NO_CHILDREN
+    if(len(element) != 0):
+        children = tuple(elementToRecord(child) for child in element if isinstance(child.tag,str))
+    return XML_ParameterRecord(element.tag,value,valueString,text,children)
+
+#
+# Returns the records of the parameters of a dictionary of the form returned by
+# XML_ParameterListArray.toDict()
+#
+def valuesToRecords(values):
+    records = []
+    for name, instances in values.items():
+        if(type(instances) is not list): instances = [instances]
+        for instance in instances:
+            if(type(instance) is dict and TEXT_KEY in instance):
+                records.append(XML_ParameterRecord(name,None,None,instance[TEXT_KEY],NO_CHILDREN))
+            elif(type(instance) is dict):
+                records.append(XML_ParameterRecord(name,None,None,None,tuple(valuesToRecords(instance))))
+            else:
+                records.append(XML_ParameterRecord(name,freezeValue(instance),getValueString(instance),None,NO_CHILDREN))
+    return records
+
+def getValueString(value):
+    if(type(value) is not str): return UNKNOWN_VALUE_STRING
+    if(len(value.strip()) == 0): return None
+    return value.strip()
+
+def freezeValue(value):
+    if(np != None and isinstance(value,np.ndarray)): value.flags.writeable = False
+    return value
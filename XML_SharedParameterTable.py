@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+
+#############################################################################
+#                       XML_SharedParameterTable.py
+#
+# The decoded parameters of an XML parameter list array published in a flat
+# binary layout, in shared memory or a memory mapped file, so that any number
+# of processes can read them without parsing the XML file or copying the
+# parameter data.
+#
+#############################################################################
+#
+# Copyright  2025- Chris Anderson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the Lesser GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a copy of the GNU General Public License see
+# <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import os
+import sys
+import mmap
+import struct
+import threading
+from multiprocessing import shared_memory, resource_tracker
+
+from XML_ParameterListArray import getArrayElementType, arrayToBytes, bytesToArray, ARRAY_TYPES
+from XML_ParameterTable import XML_ParameterTable, UNKNOWN_VALUE_STRING
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#
+# Layout (all integers little-endian, all sections 8 byte aligned):
+#
+#   header          : magic, version, then the (offset, count) of each section
+#   list table      : LIST_ENTRY per parameter list, sorted by name
+#   parameter table : PARAMETER_ENTRY per parameter (first instance), the entries
+#                     of each parameter list contiguous and sorted by name
+#   name table      : NAME_ENTRY per parameter instance, giving the names of the
+#                     parameters of each parameter list in order
+#   child table     : CHILD_ENTRY per child parameter, in order
+#   string pool     : the UTF-8 encoded names and string values (each stored once)
+#   data            : the 8 byte scalar values and the raw array values
+#
+# Names are strings of the pool referenced by (offset, length); lookups are
+# binary searches of the sorted tables. A value is referenced by (tag, offset,
+# length), with offset into the pool for strings and into the data section
+# otherwise. The stripped value attribute string of a parameter is kept in the
+# pool as well, for getParameterValueOrText(..).
+#
+
+SHARED_TABLE_MAGIC   = b"XPLS"
+SHARED_TABLE_VERSION = 2
+
+HEADER          = struct.Struct("<4sIQ12Q")
+LIST_ENTRY      = struct.Struct("<6Q")   # name offset, name length, first parameter, parameter count,
+                                         # first name, name count
+PARAMETER_ENTRY = struct.Struct("<11Q")  # name offset, name length, value tag, value offset, value length,
+                                         # value string offset, value string length, text offset, text length,
+                                         # first child, child count
+NAME_ENTRY      = struct.Struct("<2Q")   # name offset, name length
+CHILD_ENTRY     = struct.Struct("<5Q")   # name offset, name length, value tag, value offset, value length
+
+# String offsets of an absent text (or value string), and of a value string
+# not known (that of a non-string value of a table created from a dictionary)
+
+NO_TEXT      = 0xFFFFFFFFFFFFFFFF
+UNKNOWN_TEXT = 0xFFFFFFFFFFFFFFFE
+
+VALUE_NONE, VALUE_INT, VALUE_FLOAT, VALUE_BOOL, VALUE_STRING, VALUE_LONG_INT, \
+VALUE_DOUBLE_ARRAY, VALUE_LONG_ARRAY = range(8)
+
+ARRAY_VALUE_TYPES = {VALUE_DOUBLE_ARRAY : "double[]", VALUE_LONG_ARRAY : "long[]"}
+
+# Serializes the attachments made with the resource tracker registration suppressed
+
+ATTACH_LOCK = threading.Lock()
+
+#
+# A read-only parameter table attached to the shared memory segment name, or
+# to the memory mapped file fileName, written by publishParameterTable(..) or
+# outputSharedParameterTableFile(..). The getters have the names, arguments
+# and exceptions of those of XML_ParameterListArray.
+#
+# Example:
+#
+#   published = publishParameterTable("case.xml")                 (parent process)
+#   ... start the workers, passing them published.name ...
+#
+#   parameters = XML_SharedParameterTable(name)                   (worker process)
+#   tolerance  = parameters.getParameterValue("tolerance","SolverParameters")
+#
+#   published.close()                                             (parent process, once
+#   published.unlink()                                             the workers are done)
+#
+# Array values are returned as read-only NumPy arrays that are views of the
+# shared data (or, without NumPy, as array.array copies). Such views must be
+# released before close() is called.
+#
+# Only the first instance of a repeated parameter list is published, and
+# child parameters are published to one level.
+#
+class XML_SharedParameterTable:
+    def __init__(self, name = None, fileName = None, sharedMemory = None):
+        self.sharedMemory = None
+        self.mmap         = None
+        self.owner        = False
+        if(sharedMemory != None):
+            self.sharedMemory = sharedMemory
+            self.owner        = True
+        elif(name != None):
+            if(sys.version_info >= (3,13)):
+                self.sharedMemory = shared_memory.SharedMemory(name = name, track = False)
+            else:
+                self.sharedMemory = attachSharedMemory(name)
+        elif(fileName != None):
+            with open(fileName,"rb") as mappedFile:
+                self.mmap = mmap.mmap(mappedFile.fileno(),0,access = mmap.ACCESS_READ)
+        else:
+            raise Exception("\n XML_SharedParameterTable requires a shared memory name or file name")
+
+        if(self.sharedMemory != None): self.buffer = self.sharedMemory.buf
+        else:                          self.buffer = memoryview(self.mmap)
+        self.name = self.sharedMemory.name if self.sharedMemory != None else None
+
+        header = HEADER.unpack_from(self.buffer,0)
+        if(header[0] != SHARED_TABLE_MAGIC or header[1] != SHARED_TABLE_VERSION):
+            self.close()
+            raise Exception("\n Not a shared parameter table (or incompatible version) : " + str(name or fileName))
+        (self.listOffset,      self.listCount,      self.parameterOffset, self.parameterCount,
+         self.nameOffset,      self.nameCount,      self.childOffset,     self.childCount,
+         self.stringOffset,    self.stringSize,     self.dataOffset,      self.dataSize) = header[3:]
+
+    def close(self):
+        if(self.buffer != None and self.sharedMemory == None): self.buffer.release()
+        self.buffer = None
+        if(self.sharedMemory != None): self.sharedMemory.close()
+        if(self.mmap != None): self.mmap.close()
+
+    #
+    # Removes the shared memory segment; only the table returned by
+    # publishParameterTable(..) removes the segment.
+    #
+    def unlink(self):
+        if(self.owner): self.sharedMemory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def getString(self, offset, length):
+        start = self.stringOffset + offset
+        return str(self.buffer[start:start + length],"utf-8")
+
+    def getStringBytes(self, offset, length):
+        start = self.stringOffset + offset
+        return self.buffer[start:start + length].tobytes()
+
+    def getValue(self, tag, offset, length, name):
+        if(tag == VALUE_NONE):
+            raise ValueError("value attribute not specified in ",name)
+        start = self.dataOffset + offset
+        if(tag == VALUE_FLOAT):  return struct.unpack_from("<d",self.buffer,start)[0]
+        if(tag == VALUE_INT):    return struct.unpack_from("<q",self.buffer,start)[0]
+        if(tag == VALUE_BOOL):   return struct.unpack_from("<q",self.buffer,start)[0] != 0
+        if(tag == VALUE_STRING): return self.getString(offset,length)
+        if(tag == VALUE_LONG_INT): return int(self.getString(offset,length))
+        valType = ARRAY_VALUE_TYPES[tag]
+        if(np != None):
+            value = np.frombuffer(self.buffer,dtype = ARRAY_TYPES[valType][1],count = length//8,offset = start)
+            value.flags.writeable = False
+            return value
+        return bytesToArray(self.buffer[start:start + length],valType)
+
+    #
+    # Binary search for the entry with name key (UTF-8 bytes) among the count
+    # entries of table (at offset) starting with entry first; returns the entry
+    # index or -1.
+    #
+    def searchTable(self, table, offset, first, count, key):
+        low, high = first, first + count
+        while(low < high):
+            middle = (low + high)//2
+            nameOffset, nameLength = struct.unpack_from("<2Q",self.buffer,offset + middle*table.size)
+            name = self.getStringBytes(nameOffset,nameLength)
+            if(name < key):   low  = middle + 1
+            elif(name > key): high = middle
+            else:             return middle
+        return -1
+
+    def findParameterListEntry(self, parameterListName):
+        index = self.searchTable(LIST_ENTRY,self.listOffset,0,self.listCount,parameterListName.encode("utf-8"))
+        if(index < 0): return None
+        return LIST_ENTRY.unpack_from(self.buffer,self.listOffset + index*LIST_ENTRY.size)
+
+    def findParameterList(self, parameterListName):
+        listEntry = self.findParameterListEntry(parameterListName)
+        if(listEntry == None):
+            raise Exception("\n ParameterList not found \n ParameterList specified  : " + parameterListName)
+        return listEntry
+
+    def findParameterEntry(self, listEntry, parameterName):
+        index = self.searchTable(PARAMETER_ENTRY,self.parameterOffset,listEntry[2],listEntry[3],\
+                                 parameterName.encode("utf-8"))
+        if(index < 0): return None
+        return PARAMETER_ENTRY.unpack_from(self.buffer,self.parameterOffset + index*PARAMETER_ENTRY.size)
+
+    def findParameter(self, parameterName, parameterListName):
+        parameterEntry = self.findParameterEntry(self.findParameterList(parameterListName),parameterName)
+        if(parameterEntry == None):
+            raise Exception("\n Parameter not found in ParameterList \n ParmeterList : " + parameterListName \
+                             + "\n Parameter    : " + parameterName)
+        return parameterEntry
+
+    def getParameterValue(self, parameterName, parameterListName):
+        parameterEntry = self.findParameter(parameterName,parameterListName)
+        return self.getValue(parameterEntry[2],parameterEntry[3],parameterEntry[4],parameterName)
+
+    def getParameterValueOrDefault(self, parameterName, parameterListName, defaultValue):
+        parameterEntry = self.findParameterEntry(self.findParameterList(parameterListName),parameterName)
+        if(parameterEntry == None): return defaultValue
+        return self.getValue(parameterEntry[2],parameterEntry[3],parameterEntry[4],parameterName)
+
+    def getParameterText(self, parameterName, parameterListName):
+        parameterEntry = self.findParameter(parameterName,parameterListName)
+        if(parameterEntry[7] == NO_TEXT): return None
+        return self.getString(parameterEntry[7],parameterEntry[8])
+
+    #
+    # As XML_ParameterListArray.getParameterValueOrText(..), returns the stripped
+    # value attribute string (not the decoded value), or if there is no value
+    # attribute, the stripped text.
+    #
+    def getParameterValueOrText(self, parameterName, parameterListName):
+        parameterEntry = self.findParameter(parameterName,parameterListName)
+        if(parameterEntry[2] == VALUE_NONE):
+            if(parameterEntry[7] == NO_TEXT): return None
+            return self.getString(parameterEntry[7],parameterEntry[8])
+        if(parameterEntry[5] == UNKNOWN_TEXT):
+            raise Exception("\n Value string not recorded (table created from a dictionary) \n ParmeterList : " \
+                             + parameterListName + "\n Parameter    : " + parameterName)
+        if(parameterEntry[5] == NO_TEXT): return None
+        return self.getString(parameterEntry[5],parameterEntry[6])
+
+    def getParameterListNames(self):
+        names = []
+        for index in range(self.listCount):
+            nameOffset, nameLength = struct.unpack_from("<2Q",self.buffer,self.listOffset + index*LIST_ENTRY.size)
+            names.append(self.getString(nameOffset,nameLength))
+        return names
+
+    def getParameterNames(self, parameterListName):
+        listEntry = self.findParameterList(parameterListName)
+        names = []
+        for index in range(listEntry[4],listEntry[4] + listEntry[5]):
+            nameOffset, nameLength = NAME_ENTRY.unpack_from(self.buffer,self.nameOffset + index*NAME_ENTRY.size)
+            names.append(self.getString(nameOffset,nameLength))
+        return names
+
+    def isParameterList(self, parameterListName):
+        return self.findParameterListEntry(parameterListName) != None
+
+    def isParameter(self, parameterName, parameterListName):
+        return self.findParameterEntry(self.findParameterList(parameterListName),parameterName) != None
+
+    def getChildEntries(self, parameterEntry):
+        for index in range(parameterEntry[9],parameterEntry[9] + parameterEntry[10]):
+            yield CHILD_ENTRY.unpack_from(self.buffer,self.childOffset + index*CHILD_ENTRY.size)
+
+    def getParameterChildNames(self, parameterName, parameterListName):
+        parameterEntry = self.findParameter(parameterName,parameterListName)
+        return [self.getString(childEntry[0],childEntry[1]) for childEntry in self.getChildEntries(parameterEntry)]
+
+    def getParameterChildValues(self, parameterChildName, parameterName, parameterListName):
+        parameterEntry = self.findParameter(parameterName,parameterListName)
+        key = parameterChildName.encode("utf-8")
+        childValues = []
+        for childEntry in self.getChildEntries(parameterEntry):
+            if(self.getStringBytes(childEntry[0],childEntry[1]) != key): continue
+            childValues.append(self.getValue(childEntry[2],childEntry[3],childEntry[4],parameterChildName))
+        if(len(childValues) == 0):
+            raise Exception("\n Child parameter not found  \n ParmeterList   : " + parameterListName \
+                             + "\n Parameter      : "  + parameterName   \
+                             + "\n ChildParameter : " + parameterChildName)
+        return childValues
+
+#
+# Publishes the parameters of source (an XML_ParameterTable, or any source
+# accepted by XML_ParameterTable, e.g. an XML_ParameterListArray or file name)
+# in a new shared memory segment, named name if specified, and returns the
+# XML_SharedParameterTable attached to it. Other processes attach with
+# XML_SharedParameterTable(published.name).
+#
+def publishParameterTable(source, name = None, parameterLists = None, useCacheFile = False):
+    data = createSharedTableBytes(source,parameterLists,useCacheFile)
+    sharedMemory = shared_memory.SharedMemory(name = name,create = True,size = len(data))
+    sharedMemory.buf[:len(data)] = data
+    return XML_SharedParameterTable(sharedMemory = sharedMemory)
+
+#
+# Attaches to the existing shared memory segment name (before Python 3.13).
+# Attaching would register the segment with the resource tracker, which is
+# shared with the publishing process by processes started with spawn or
+# forkserver, and which unlinks the segment when a registering process exits
+# (or fails to find the publisher's registration when it unlinks); the
+# registration is suppressed, as the segment belongs to the publishing process.
+#
+def attachSharedMemory(name):
+    with ATTACH_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype : None
+        try:
+            return shared_memory.SharedMemory(name = name)
+        finally:
+            resource_tracker.register = register
+
+#
+# Writes the shared table layout of source to fileName, for processes to
+# attach with XML_SharedParameterTable(fileName = fileName)
+#
+def outputSharedParameterTableFile(source, fileName, parameterLists = None, useCacheFile = False):
+    data = createSharedTableBytes(source,parameterLists,useCacheFile)
+    temporaryName = fileName + ".tmp" + str(os.getpid())
+    with open(temporaryName,"wb") as tableFile:
+        tableFile.write(data)
+    os.replace(temporaryName,fileName)
+
+#
+# Returns the shared table layout (bytes) of the parameters of source
+#
+def createSharedTableBytes(source, parameterLists = None, useCacheFile = False):
+    if(not isinstance(source,XML_ParameterTable)):
+        source = XML_ParameterTable(source,parameterLists = parameterLists,useCacheFile = useCacheFile)
+
+    strings = {}
+    stringPool = bytearray()
+    def addString(string):
+        location = strings.get(string)
+        if(location == None):
+            encoded  = string.encode("utf-8")
+            location = (len(stringPool),len(encoded))
+            strings[string] = location
+            stringPool.extend(encoded)
+        return location
+
+    data = bytearray()
+    def addValue(value):
+        if(value is None):           return VALUE_NONE, 0, 0
+        if(type(value) is str):      return (VALUE_STRING,) + addString(value)
+        elementType = getArrayElementType(value)
+        if(elementType != None):
+            tag = VALUE_DOUBLE_ARRAY if elementType is float else VALUE_LONG_ARRAY
+            raw = arrayToBytes(value,elementType)
+            location = (len(data),len(raw))
+            data.extend(raw)
+            return (tag,) + location
+        offset = len(data)
+        if(type(value) is bool):
+            data.extend(struct.pack("<q",1 if value else 0))
+            return VALUE_BOOL, offset, 8
+        if(type(value) is float):
+            data.extend(struct.pack("<d",value))
+            return VALUE_FLOAT, offset, 8
+        if(type(value) is int):
+            if(-2**63 <= value < 2**63):
+                data.extend(struct.pack("<q",value))
+                return VALUE_INT, offset, 8
+            return (VALUE_LONG_INT,) + addString(str(value))
+        return (VALUE_STRING,) + addString(str(value))
+
+    listEntries      = []
+    parameterEntries = []
+    nameEntries      = []
+    childEntries     = []
+    for parameterListName in sorted(source.parameterLists,key = lambda name : name.encode("utf-8")):
+        parameterList = source.parameterLists[parameterListName]
+        listEntries.append(addString(parameterListName) + (len(parameterEntries),len(parameterList.parameters),\
+                                                           len(nameEntries),len(parameterList.parameterNames)))
+        for parameterName in parameterList.parameterNames:
+            nameEntries.append(addString(parameterName))
+        for parameterName in sorted(parameterList.parameters,key = lambda name : name.encode("utf-8")):
+            record    = parameterList.parameters[parameterName]
+            valueInfo = addValue(record.value)
+            textInfo  = (NO_TEXT,0) if record.text == None else addString(record.text)
+            if(record.valueString is UNKNOWN_VALUE_STRING): valueStringInfo = (UNKNOWN_TEXT,0)
+            elif(record.valueString == None):               valueStringInfo = (NO_TEXT,0)
+            else:                                           valueStringInfo = addString(record.valueString)
+            parameterEntries.append(addString(parameterName) + valueInfo + valueStringInfo + textInfo \
+                                    + (len(childEntries),len(record.children)))
+            for child in record.children:
+                childEntries.append(addString(child.name) + addValue(child.value))
+
+    sections = [(LIST_ENTRY,listEntries),(PARAMETER_ENTRY,parameterEntries),\
+                (NAME_ENTRY,nameEntries),(CHILD_ENTRY,childEntries)]
+    layout   = []
+    offset   = HEADER.size
+    for entryStruct, entries in sections:
+        layout.extend((offset,len(entries)))
+        offset += entryStruct.size*len(entries)
+    stringOffset = alignOffset(offset)
+    dataOffset   = alignOffset(stringOffset + len(stringPool))
+    layout.extend((stringOffset,len(stringPool),dataOffset,len(data)))
+
+    output = bytearray(HEADER.pack(SHARED_TABLE_MAGIC,SHARED_TABLE_VERSION,0,*layout))
+    for entryStruct, entries in sections:
+        for entry in entries: output.extend(entryStruct.pack(*entry))
+    output.extend(bytes(stringOffset - len(output)))
+    output.extend(stringPool)
+    output.extend(bytes(dataOffset - len(output)))
+    output.extend(data)
+    return bytes(output)
+
+def alignOffset(offset):
+    return (offset + 7)//8*8